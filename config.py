@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
-from typing import List
+from typing import List, Literal, Optional
 
 class Settings(BaseSettings):
     GOOGLE_API_KEY : str
@@ -15,16 +15,84 @@ class Settings(BaseSettings):
     
     FAQ_DATA_PATH: str = "src/data/store_qa.csv"
     DATABASE_URL: str = "sqlite:///./customer_service.db"
+    DB_AUTO_INIT: bool = False  # Create schema and seed data on API startup (local dev only)
     API_BASE_URL: str = "http://localhost:8000"  # Default for local dev, override for Docker
+    BULK_INSERT_BATCH_SIZE: int = 500  # Rows per multi-row INSERT in bulk endpoints
+    BULK_MAX_ITEMS: int = 10000  # Per bulk request; keeps IN lists under asyncpg's 32767 bind parameters
+    LOOKUP_MAX_IDS: int = 1000  # Order IDs per GET /orders?ids= or POST /orders/lookup
+    WRITE_BATCH_ENABLED: bool = False  # Experimental group commit of single writes; slower in benchmarks (see README)
+    WRITE_BATCH_MAX_SIZE: int = 100  # Writes per group commit
+    WRITE_BATCH_WINDOW_MS: float = 5.0  # How long a group commit waits to fill up
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per server-side cursor batch in exports
+    METRICS_ENABLED: bool = True  # Request/SQL instrumentation served at /metrics
+
+    # Database connection pool (per process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements cached per connection
+
+    # SQLite (default local/edge database)
+    SQLITE_CONCURRENCY_MODE: bool = True  # WAL + relaxed fsync + a single serialized writer connection (see README)
+    SQLITE_READ_POOL_SIZE: int = 4  # Reader connections in concurrency mode (replaces DB_POOL_SIZE/DB_MAX_OVERFLOW)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    SQLITE_CACHE_SIZE_KB: int = 65536
+
+    # Read-through cache for order/complaint lookups
+    CACHE_ENABLED: bool = False
+    CACHE_REDIS_URL: Optional[str] = None  # Without it entries live in each worker's memory
+    CACHE_ORDER_TTL: int = 300
+    CACHE_COMPLAINT_TTL: int = 60
+    CACHE_LOCAL_MAX_ENTRIES: int = 10000
+
+    # Idempotency-Key support on POST /complaints and /escalations (stored in CACHE_REDIS_URL)
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_TTL_SECONDS: int = 30  # Max time a first request may hold its key
 
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
-    CELERY_TASK_SERIALIZER: str = "json"
+    CELERY_TASK_SERIALIZER: Literal["json", "msgpack"] = "json"  # msgpack needs the msgpack package
+    CELERY_RESULT_COMPRESSION_THRESHOLD: int = 1024  # zlib-compress results from this many bytes; 0 disables
+    CELERY_RESULT_EXPIRES: int = 3600  # Default result TTL in seconds
+    CELERY_LOOKUP_RESULT_TTL: int = 300  # Shorter TTL for read-only lookup results
     CELERY_TASK_TIME_LIMIT: int = 600
     CELERY_TASK_ACKS_LATE: bool = False
-    CELERY_WORKER_CONCURRENCY: int = 2
+    # Tasks are I/O-bound; pool threads share one event loop, HTTP client and DB pool
+    CELERY_WORKER_POOL: Literal["threads", "prefork", "solo"] = "threads"
+    CELERY_WORKER_CONCURRENCY: int = 32  # Threads per worker; size prefork by CPUs instead
+    CELERY_WORKER_PREFETCH_MULTIPLIER: int = 1
+    CELERY_DAILY_REPORT_CRON: str = "5 0 * * *"  # Beat schedule for publish_daily_report (UTC); reports the previous day
+    DAILY_REPORT_RECIPIENT: str = "support-leads@example.com"
+    DAILY_REPORT_CHANNEL: str = "email"
+    DAILY_STATS_ROLLUP_INTERVAL_SECONDS: int = 60  # How often Beat folds counter deltas into daily_stats
+    DAILY_STATS_ROLLUP_BATCH_SIZE: int = 5000  # Deltas folded per transaction
+    DAILY_STATS_ROLLUP_MAX_BATCHES: int = 20  # Transactions per run; the rest waits for the next run
+    ESCALATION_STALE_AFTER_MINUTES: int = 1440  # Pending longer than this counts as stale
+    ESCALATION_SWEEP_INTERVAL_SECONDS: int = 900
+    ESCALATION_SWEEP_BATCH_SIZE: int = 500  # Escalations per sweep batch (one transaction each)
+    ESCALATION_SWEEP_MAX_BATCHES: int = 20  # Per run; the rest waits for the next run
+    ESCALATION_ALERT_RECIPIENT: str = "support-leads@example.com"
+    NOTIFICATION_DIGEST_WINDOW_SECONDS: float = 30.0  # Notifications to one recipient within this go out as one digest
+    NOTIFICATION_BATCH_SIZE: int = 100  # Digests per transport call
+    NOTIFICATION_MAX_BUFFERED: int = 10000  # Per worker process; a full buffer is sent before the window closes
+    NOTIFICATION_MAX_ATTEMPTS: int = 5  # Transport calls per batch before its digests are dropped
+    NOTIFICATION_RETRY_BACKOFF_SECONDS: float = 2.0  # First retry delay, doubled for each next one
+    NOTIFICATION_WEBHOOK_URL: Optional[str] = None  # Without it digests go to the local stub transport
+    NOTIFICATION_STUB_LATENCY_MS: float = 0  # Simulated round trip per batch for the stub
     CELERY_TASK_MAX_RETRIES: int = 3
-    CELERY_TASK_RETRY_DELAY: int = 5
+    CELERY_TASK_RETRY_DELAY: int = 5  # Base of the exponential retry backoff
+    CELERY_TASK_RETRY_BACKOFF_MAX: int = 300  # Cap on a single retry delay, in seconds
+    CELERY_BATCH_LOOKUP_CHUNK_SIZE: int = 200  # Order IDs per /orders/lookup call (at most LOOKUP_MAX_IDS)
+    CELERY_BATCH_CONCURRENCY: int = 8  # Lookup calls in flight per batch task
+    CELERY_BATCH_SUBTASK_SIZE: int = 5000  # Larger batches are split into a chord of sub-tasks
+    CELERY_TASK_DATA_ACCESS: Literal["http", "direct"] = "http"  # Tasks call the API, or query the DB themselves
+    CELERY_HTTP2: bool = False  # Needs the h2 package (httpx[http2])
+    CELERY_HTTP_MAX_CONNECTIONS: int = 100  # Per worker process, to the API
+    CELERY_HTTP_MAX_KEEPALIVE: int = 20
+    CELERY_METRICS_PORT: int = 9808  # Worker task metrics for Prometheus; 0 disables the endpoint
 
     REDIS_PASSWORD: str
     REDIS_APPENDONLY: str
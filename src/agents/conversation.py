@@ -59,8 +59,7 @@ CELERY_AVAILABLE = False
 try:
     from backend.celery.tasks import (
         check_complaint_by_id,
-        check_complaint_by_order,
-        create_complaint,
+        ensure_complaint,
         get_complaint_details,
         get_order_status,
         escalate_complaint as escalate_complaint_task
@@ -151,59 +150,52 @@ def complaint(runtime: ToolRuntime[Context]) -> str:
     if not ctx.order_id:
         ctx.order_id = input("Please provide Order ID: ").strip() or "ORD123"
 
-    # Check if complaint already exists for this order using Celery
-    if CELERY_AVAILABLE:
-        try:
-            result = check_complaint_by_order.delay(ctx.order_id)
-            data = result.get(timeout=10)  # Wait up to 10 seconds for result
-            
-            if data.get("exists"):
-                ctx.complaint_id = data['complaint_id']  # Store existing complaint ID
-                return f"⚠️ A complaint already exists for order {ctx.order_id}:\n" \
-                       f"Complaint ID: {data['complaint_id']}\n" \
-                       f"Issue: {data['issue']}\n" \
-                       f"Escalation Status: {data['escalation_status']}"
-        except Exception as e:
-            print(f"Warning: Celery task failed, falling back to direct API: {e}")
-
     if not ctx.complaint_reason:
         ctx.complaint_reason = input("Please provide Complaint Reason: ").strip() or "General Issue"
 
-    ctx.complaint_id = str(uuid.uuid4())
+    complaint_id = str(uuid.uuid4())
 
-    # Create complaint using Celery
+    # Create the complaint, or get back the one already filed for this order, in one call
     if CELERY_AVAILABLE:
         try:
-            result = create_complaint.delay(ctx.complaint_id, ctx.order_id, ctx.complaint_reason)
+            result = ensure_complaint.delay(complaint_id, ctx.order_id, ctx.complaint_reason)
             response_data = result.get(timeout=10)
-            
-            if "error" in response_data:
-                if response_data.get("status_code") == 400:
-                    return f"⚠️ Complaint already exists for this order."
-                elif response_data.get("status_code") == 404:
-                    return f"❌ Order {ctx.order_id} not found in the system."
-                else:
-                    return f"❌ Failed to submit complaint: {response_data['error']}"
-            
-            return f"✅ Complaint submitted successfully!\n" \
-                   f"Complaint ID: {ctx.complaint_id}\n" \
-                   f"Order ID: {ctx.order_id}\n" \
-                   f"Issue: {ctx.complaint_reason}"
         except Exception as e:
             return f"⚠️ Error processing complaint via Celery: {e}"
+
+        if "error" in response_data:
+            if response_data.get("status_code") == 404:
+                return f"❌ Order {ctx.order_id} not found in the system."
+            return f"❌ Failed to submit complaint: {response_data['error']}"
     else:
         # Fallback to direct API call
-        payload = {"id": ctx.complaint_id, 
-                   "order_id": ctx.order_id, 
+        payload = {"id": complaint_id,
+                   "order_id": ctx.order_id,
                    "issue": ctx.complaint_reason}
         try:
-            response = requests.post(f"{API_BASE_URL}/complaints", json=payload, timeout=5)
-            if response.status_code == 200:
-                return f"✅ Complaint submitted successfully (ID: {ctx.complaint_id})."
-            return f"❌ Failed to submit complaint: {response.status_code}"
+            response = requests.post(f"{API_BASE_URL}/complaints/ensure", json=payload, timeout=5)
         except Exception as e:
             return f"⚠️ Error connecting to complaint system: {e}"
 
+        if response.status_code == 404:
+            return f"❌ Order {ctx.order_id} not found in the system."
+        if response.status_code != 200:
+            return f"❌ Failed to submit complaint: {response.status_code}"
+        response_data = response.json()
+
+    ctx.complaint_id = response_data["complaint_id"]
+
+    if not response_data["created"]:
+        return f"⚠️ A complaint already exists for order {ctx.order_id}:\n" \
+               f"Complaint ID: {response_data['complaint_id']}\n" \
+               f"Issue: {response_data['issue']}\n" \
+               f"Escalation Status: {response_data['escalation_status']}"
+
+    return f"✅ Complaint submitted successfully!\n" \
+           f"Complaint ID: {ctx.complaint_id}\n" \
+           f"Order ID: {ctx.order_id}\n" \
+           f"Issue: {ctx.complaint_reason}"
+
 @tool
 @traceable
 def check_complaint_status(runtime: ToolRuntime[Context]) -> str:
@@ -1,12 +1,25 @@
-from fastapi import FastAPI, HTTPException, Depends
+from time import perf_counter
+
+# Taken before the heavy imports so cold-start reporting covers them
+IMPORT_STARTED = perf_counter()
+
+from fastapi import FastAPI, HTTPException, Depends, Query, Header
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from uuid import uuid4
+from datetime import date, datetime, timedelta
+import base64
+import csv
+import io
+import json
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 import sys
 from pathlib import Path
 import uvicorn
+import logging
+from contextlib import asynccontextmanager
 
 # Add root directory to path so we can import config
 root_dir = Path(__file__).parent.parent.parent
@@ -17,29 +30,100 @@ from config import get_settings
 # Add parent directory to path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from memory.base import Base, async_engine, sync_engine
+from memory.base import async_engine, async_write_engine, dialect_insert, pool_metrics, pool_status
 from memory.complaints import Complaint 
 from memory.order import Order 
 from memory.escalation import Escalation 
+from memory import repository
+from memory.repository import RepositoryError, bump_daily_stats, complaint_cache_keys, complaint_to_dict
+from cache import ReadThroughCache, backend_from_settings
+from idempotency import IdempotencyStore
+from write_batcher import WriteCoalescer
+from metrics import instrument_engine, metrics_middleware, metrics_response, register_gauge
+from init_db import init_db
 
-# Create tables using sync engine
-Base.metadata.create_all(bind=sync_engine)
+# Schema and seed data are managed by init_db.py, not at import
 settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
 
-# Create async session maker
+# Create async session makers; writes use the write engine (a single
+# serialized connection on SQLite, the same pool on Postgres)
 AsyncSessionLocal = async_sessionmaker(
     async_engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
+AsyncWriteSessionLocal = async_sessionmaker(
+    async_write_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+def session_dependency(session_factory):
+    async def dependency():
+        async with session_factory() as session:
+            # Acquire the connection up front so pool wait time is measured
+            started = perf_counter()
+            await session.connection()
+            pool_metrics.record_wait(perf_counter() - started)
+            yield session
+    return dependency
+
+get_db = session_dependency(AsyncSessionLocal)
+get_write_db = session_dependency(AsyncWriteSessionLocal)
+
+# Same session lifecycle for handlers that only touch the DB on a cache miss
+db_session = asynccontextmanager(get_db)
+write_session = asynccontextmanager(get_write_db)
+
+# Optional group commit for single-item writes (complaints, escalations)
+write_coalescer = WriteCoalescer(
+    AsyncWriteSessionLocal,
+    max_batch=settings.WRITE_BATCH_MAX_SIZE,
+    window_ms=settings.WRITE_BATCH_WINDOW_MS
+) if settings.WRITE_BATCH_ENABLED else None
+
+async def run_write(operation):
+    """Run operation(db) and commit, either in its own transaction or as part of a group commit.
+    Operations must not commit or roll back themselves; raising discards their changes."""
+    if write_coalescer is not None:
+        return await write_coalescer.submit(operation)
+
+    async with write_session() as db:
+        result = await operation(db)
+        await db.commit()
+        return result
+
+response_cache = ReadThroughCache.from_settings(settings)
+
+# Stored responses for retried writes; shares the cache's Redis when configured
+idempotency_store = IdempotencyStore(
+    backend_from_settings(settings),
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_ttl=settings.IDEMPOTENCY_LOCK_TTL_SECONDS
+)
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
+def http_error(exc: RepositoryError) -> HTTPException:
+    return HTTPException(status_code=exc.status_code, detail=exc.detail)
 
 # Create FastAPI app
 app = FastAPI(title="Customer Service API")
 
+if settings.METRICS_ENABLED:
+    instrument_engine(async_engine)
+    if async_write_engine is not async_engine:
+        instrument_engine(async_write_engine)
+    app.middleware("http")(metrics_middleware)
+
+    register_gauge("api_db_pool_checked_out", "Connections currently checked out of the pool",
+                   lambda: pool_status().get("checkedout", 0))
+    register_gauge("api_db_pool_overflow", "Connections open beyond the pool size",
+                   lambda: max(pool_status().get("overflow", 0), 0))
+    register_gauge("api_db_pool_checkout_wait_max_seconds", "Longest pool checkout wait so far",
+                   lambda: pool_metrics.wait_max)
+    register_gauge("api_cache_hits", "Read-through cache hits", lambda: response_cache.hits)
+    register_gauge("api_cache_misses", "Read-through cache misses", lambda: response_cache.misses)
+
 class ComplaintCreate(BaseModel):
     id: str
     order_id: str
@@ -49,6 +133,33 @@ class ComplaintResponse(BaseModel):
     message: str
     complaint_id: str
 
+class ComplaintEnsureResponse(BaseModel):
+    created: bool
+    complaint_id: str
+    order_id: str
+    issue: str
+    escalation_status: str
+
+class ComplaintBulkCreate(BaseModel):
+    complaints: List[ComplaintCreate] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+class ComplaintBulkItemResult(BaseModel):
+    complaint_id: str
+    status: str
+    detail: Optional[str] = None
+
+class ComplaintBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[ComplaintBulkItemResult]
+
+class OrderLookupRequest(BaseModel):
+    order_ids: List[str] = Field(..., min_length=1, max_length=settings.LOOKUP_MAX_IDS)
+
+class ReportRebuildRequest(BaseModel):
+    start: date
+    end: date
+
 class EscalationRequest(BaseModel):
     complaint_id: str
 
@@ -56,157 +167,443 @@ class EscalationResponse(BaseModel):
     message: str
     escalation_id: str
 
-# Initialize sample orders if database is empty
-async def init_sample_data(db: AsyncSession):
-    """Initialize sample orders if they don't exist"""
-    sample_orders = [
-        {"order_id": "ORD123", "status": "Shipped", "estimated_delivery": "2025-07-20"},
-        {"order_id": "ORD456", "status": "Processing", "estimated_delivery": "2025-07-25"},
-        {"order_id": "ORD141", "status": "Delivered", "estimated_delivery": "2025-07-15"}
-    ]
-    
-    for order_data in sample_orders:
-        result = await db.execute(select(Order).filter(Order.order_id == order_data["order_id"]))
-        existing = result.scalar_one_or_none()
-        if not existing:
-            order = Order(**order_data)
-            db.add(order)
-    
-    await db.commit()
+class StatsRollupRequest(BaseModel):
+    limit: int = Field(5000, ge=1, le=50000)
+
+class EscalationSweepRequest(BaseModel):
+    older_than_minutes: int = Field(..., ge=1)
+    limit: int = Field(500, ge=1, le=5000)
+
+class SweepAdvanceRequest(BaseModel):
+    last_created_at: datetime
+    last_id: str
+
+class ComplaintWorkflowRequest(BaseModel):
+    order_id: str
+    issue: str
+    complaint_id: Optional[str] = None
 
-# Initialize on startup
 @app.on_event("startup")
 async def startup_event():
-    async with AsyncSessionLocal() as db:
-        await init_sample_data(db)
+    if settings.DB_AUTO_INIT:
+        # Convenience for single-process local runs; deployments run init_db.py once
+        await init_db()
+    if write_coalescer is not None:
+        await write_coalescer.start()
+
+    ready = perf_counter()
+    startup_timings["startup_ms"] = round((ready - IMPORT_FINISHED) * 1000, 1)
+    startup_timings["cold_start_ms"] = round((ready - IMPORT_STARTED) * 1000, 1)
+    logger.info(
+        f"API worker ready in {startup_timings['cold_start_ms']} ms "
+        f"(import {startup_timings['import_ms']} ms, startup {startup_timings['startup_ms']} ms)"
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if write_coalescer is not None:
+        await write_coalescer.stop()
 
 @app.post("/complaints", response_model=ComplaintResponse)
-async def create_complaint(complaint: ComplaintCreate, db: AsyncSession = Depends(get_db)):
-    """Create a new complaint"""
-    result = await db.execute(select(Complaint).filter(Complaint.id == complaint.id))
-    existing = result.scalar_one_or_none()
+async def create_complaint(
+    complaint: ComplaintCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Create a new complaint; a retry with the same Idempotency-Key replays the first response"""
+    return await idempotency_store.run("complaints", idempotency_key, complaint, lambda: insert_complaint(complaint))
 
-    if existing:
-        raise HTTPException(status_code=400, detail="Complaint already exists")
-    
-    result = await db.execute(select(Order).filter(Order.order_id == complaint.order_id))
-    order = result.scalar_one_or_none()
+async def insert_complaint(complaint: ComplaintCreate) -> ComplaintResponse:
+    try:
+        complaint_id = await run_write(
+            lambda db: repository.create_complaint(db, complaint.id, complaint.order_id, complaint.issue)
+        )
+    except RepositoryError as exc:
+        raise http_error(exc)
+    await response_cache.invalidate(*complaint_cache_keys(complaint_id, complaint.order_id))
 
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    db_complaint = Complaint(
-        id=complaint.id,
-        order_id=complaint.order_id,
-        issue=complaint.issue,
-        escalation_status="Not Escalated"
-    )
-    
-    db.add(db_complaint)
-    await db.commit()
-    await db.refresh(db_complaint)
-    
     return ComplaintResponse(
         message="Complaint created successfully",
-        complaint_id=db_complaint.id
+        complaint_id=complaint_id
     )
 
+@app.post("/complaints/ensure", response_model=ComplaintEnsureResponse)
+async def ensure_complaint(complaint: ComplaintCreate):
+    """Create a complaint unless one already exists for this ID or order, and return it either way"""
+    try:
+        response = ComplaintEnsureResponse(**await run_write(
+            lambda db: repository.ensure_complaint(db, complaint.id, complaint.order_id, complaint.issue)
+        ))
+    except RepositoryError as exc:
+        raise http_error(exc)
+    if response.created:
+        await response_cache.invalidate(*complaint_cache_keys(response.complaint_id, response.order_id))
+    return response
+
+@app.post("/complaints/bulk", response_model=ComplaintBulkResponse)
+async def create_complaints_bulk(payload: ComplaintBulkCreate, db: AsyncSession = Depends(get_write_db)):
+    """Create many complaints in a single transaction"""
+    order_ids = {item.order_id for item in payload.complaints}
+
+    # One set-based lookup for unknown orders
+    result = await db.execute(select(Order.order_id).filter(Order.order_id.in_(order_ids)))
+    known_order_ids = set(result.scalars())
+
+    rows = []
+    seen_ids = set()
+    for item in payload.complaints:
+        # Repeated IDs within the same payload are inserted once
+        if item.order_id in known_order_ids and item.id not in seen_ids:
+            seen_ids.add(item.id)
+            rows.append({
+                "id": item.id,
+                "order_id": item.order_id,
+                "issue": item.issue,
+                "escalation_status": "Not Escalated"
+            })
+
+    # One multi-row INSERT per batch, all inside the same transaction. ON CONFLICT
+    # skips IDs that already exist, including ones committed concurrently, and
+    # RETURNING reports which rows went in
+    created_ids = set()
+    batch_size = settings.BULK_INSERT_BATCH_SIZE
+    for start in range(0, len(rows), batch_size):
+        result = await db.execute(
+            dialect_insert(Complaint)
+            .values(rows[start:start + batch_size])
+            .on_conflict_do_nothing(index_elements=[Complaint.id])
+            .returning(Complaint.id)
+        )
+        created_ids.update(result.scalars())
+    if created_ids:
+        await bump_daily_stats(db, complaints=len(created_ids))
+    await db.commit()
+    await response_cache.invalidate(
+        *(key for row in rows if row["id"] in created_ids for key in complaint_cache_keys(row["id"], row["order_id"]))
+    )
+
+    results = []
+    for item in payload.complaints:
+        if item.order_id not in known_order_ids:
+            results.append(ComplaintBulkItemResult(
+                complaint_id=item.id, status="order_not_found", detail="Order not found"
+            ))
+        elif item.id in created_ids:
+            # Only the first occurrence of a repeated ID counts as created
+            created_ids.discard(item.id)
+            results.append(ComplaintBulkItemResult(complaint_id=item.id, status="created"))
+        else:
+            results.append(ComplaintBulkItemResult(
+                complaint_id=item.id, status="duplicate", detail="Complaint already exists"
+            ))
+
+    created = sum(1 for item in results if item.status == "created")
+    return ComplaintBulkResponse(
+        created=created,
+        failed=len(results) - created,
+        results=results
+    )
+
+@app.get("/orders")
+async def get_orders(ids: str = Query(..., description="Comma-separated order IDs"), db: AsyncSession = Depends(get_db)):
+    """Get the status of several orders at once"""
+    order_ids = [order_id.strip() for order_id in ids.split(",") if order_id.strip()]
+    if not order_ids:
+        raise HTTPException(status_code=422, detail="No order IDs provided")
+    if len(order_ids) > settings.LOOKUP_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {settings.LOOKUP_MAX_IDS} order IDs per request")
+    return await repository.lookup_orders(db, order_ids)
+
+@app.post("/orders/lookup")
+async def lookup_orders_endpoint(payload: OrderLookupRequest, db: AsyncSession = Depends(get_db)):
+    """Get the status of several orders at once (for ID lists too long for a query string)"""
+    return await repository.lookup_orders(db, payload.order_ids)
+
 @app.get("/orders/{order_id}")
-async def get_order_status(order_id: str, db: AsyncSession = Depends(get_db)):
+async def get_order_status(order_id: str):
     """Get order status by order ID"""
-    result = await db.execute(select(Order).filter(Order.order_id == order_id))
-    order = result.scalar_one_or_none()
-    
+    async def load():
+        async with db_session() as db:
+            return await repository.get_order(db, order_id)
+
+    order = await response_cache.get_or_load(f"order:{order_id}", settings.CACHE_ORDER_TTL, load)
+
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    
-    return {
-        "order_id": order.order_id,
-        "status": order.status,
-        "estimated_delivery": order.estimated_delivery
-    }
+
+    return order
 
 @app.post("/escalations", response_model=EscalationResponse)
-async def escalate_complaint(escalation: EscalationRequest, db: AsyncSession = Depends(get_db)):
-    """Escalate an existing complaint"""
-    # Check if complaint exists
-    result = await db.execute(select(Complaint).filter(Complaint.id == escalation.complaint_id))
-    complaint = result.scalar_one_or_none()
-    
-    if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-    
-    escalation_id = str(uuid4())
-    
-    new_escalation = Escalation(
-        id=escalation_id,
-        complaint_id=escalation.complaint_id,
-        status="Pending"
-    )
-    
-    # Update complaint escalation status
-    complaint.escalation_status = "Escalated"
-    
-    db.add(new_escalation)
-    await db.commit()
-    await db.refresh(new_escalation)
-    
+async def escalate_complaint(
+    escalation: EscalationRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Escalate an existing complaint; a retry with the same Idempotency-Key replays the first response"""
+    return await idempotency_store.run("escalations", idempotency_key, escalation, lambda: insert_escalation(escalation))
+
+async def insert_escalation(escalation: EscalationRequest) -> EscalationResponse:
+    try:
+        escalation_id, order_id = await run_write(
+            lambda db: repository.escalate_complaint(db, escalation.complaint_id)
+        )
+    except RepositoryError as exc:
+        raise http_error(exc)
+    await response_cache.invalidate(*complaint_cache_keys(escalation.complaint_id, order_id))
+
     return EscalationResponse(
         message="Complaint escalated successfully",
-        escalation_id=new_escalation.id
+        escalation_id=escalation_id
+    )
+
+@app.post("/escalations/sweep")
+async def sweep_stale_escalations(payload: EscalationSweepRequest, db: AsyncSession = Depends(get_db)):
+    """Next batch of escalations pending longer than older_than_minutes, past the
+    sweep's high-water mark; the mark stays put until /escalations/sweep/advance"""
+    return await repository.sweep_stale_escalations(db, timedelta(minutes=payload.older_than_minutes), payload.limit)
+
+@app.post("/escalations/sweep/advance")
+async def advance_escalation_sweep(payload: SweepAdvanceRequest, db: AsyncSession = Depends(get_write_db)):
+    """Move the sweep's high-water mark past a batch whose alerts were handed off"""
+    advanced = await repository.advance_sweep(db, payload.last_created_at, payload.last_id)
+    await db.commit()
+    return {"advanced": advanced}
+
+@app.post("/workflows/complaint")
+async def run_complaint_workflow(
+    workflow: ComplaintWorkflowRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Check order -> create complaint -> auto-escalate if critical, in one transaction;
+    returns a report of each step"""
+    return await idempotency_store.run(
+        "complaint_workflows", idempotency_key, workflow, lambda: execute_complaint_workflow(workflow)
+    )
+
+async def execute_complaint_workflow(workflow: ComplaintWorkflowRequest) -> dict:
+    complaint_id = workflow.complaint_id or str(uuid4())
+    report = await run_write(
+        lambda db: repository.run_complaint_workflow(db, workflow.order_id, workflow.issue, complaint_id)
     )
+    if report.get("completed"):
+        await response_cache.invalidate(*complaint_cache_keys(complaint_id, workflow.order_id))
+    return report
+
+async def get_cached_complaint(key: str, find) -> Optional[dict]:
+    """Complaint returned by find(db), through the cache; misses are cached too"""
+    async def load():
+        async with db_session() as db:
+            complaint = await find(db)
+        # Wrapped so that "no complaint" is a cacheable value
+        return {"complaint": complaint}
+
+    entry = await response_cache.get_or_load(key, settings.CACHE_COMPLAINT_TTL, load)
+    return entry["complaint"]
+
+def encode_cursor(row, columns) -> str:
+    values = [getattr(row, column.key) for column in columns]
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str, columns) -> list:
+    """Sort key of the last row of the previous page; a malformed cursor is a 400,
+    never a silent restart from the first page"""
+    try:
+        values = json.loads(base64.b64decode(cursor.encode(), altchars=b"-_", validate=True))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong number of cursor values")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else str(value)
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def keyset_page(db: AsyncSession, stmt, columns, limit: int, cursor: Optional[str]):
+    """Fetch one page ordered by columns (unique together, ending with the id),
+    seeking past the cursor instead of using OFFSET"""
+    if cursor is not None:
+        stmt = stmt.filter(tuple_(*columns) > tuple_(*decode_cursor(cursor, columns)))
+    result = await db.execute(stmt.order_by(*columns).limit(limit + 1))
+    rows = list(result.scalars())
+
+    next_cursor = encode_cursor(rows[limit - 1], columns) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+@app.get("/complaints")
+async def list_complaints(
+    escalation_status: Optional[str] = None,
+    order_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List complaints, optionally filtered, one keyset page at a time"""
+    stmt = select(Complaint)
+    if escalation_status is not None:
+        stmt = stmt.filter(Complaint.escalation_status == escalation_status)
+    if order_id is not None:
+        stmt = stmt.filter(Complaint.order_id == order_id)
+
+    complaints, next_cursor = await keyset_page(db, stmt, [Complaint.id], limit, cursor)
+
+    return {
+        "items": [complaint_to_dict(complaint) for complaint in complaints],
+        "next_cursor": next_cursor
+    }
+
+@app.get("/escalations")
+async def list_escalations(
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List escalations, optionally filtered by status, oldest first, one keyset page at a time"""
+    stmt = select(Escalation)
+    if status is not None:
+        stmt = stmt.filter(Escalation.status == status)
+
+    # Escalation ids are random UUIDs, so creation time orders the pages and the id breaks ties
+    escalations, next_cursor = await keyset_page(db, stmt, [Escalation.created_at, Escalation.id], limit, cursor)
+
+    return {
+        "items": [
+            {
+                "id": escalation.id,
+                "complaint_id": escalation.complaint_id,
+                "status": escalation.status,
+                "created_at": escalation.created_at.isoformat()
+            }
+            for escalation in escalations
+        ],
+        "next_cursor": next_cursor
+    }
 
 @app.get("/complaints/{complaint_id}")
-async def get_complaint(complaint_id: str, db: AsyncSession = Depends(get_db)):
+async def get_complaint(complaint_id: str):
     """Get complaint details by ID"""
-    result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id))
-    complaint = result.scalar_one_or_none()
-    
+    complaint = await get_cached_complaint(
+        f"complaint:{complaint_id}", lambda db: repository.get_complaint(db, complaint_id)
+    )
+
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
-    
-    return {
-        "id": complaint.id,
-        "order_id": complaint.order_id,
-        "issue": complaint.issue,
-        "escalation_status": complaint.escalation_status
-    }
+
+    return complaint
 
 @app.get("/complaints/check_by_order/{order_id}")
-async def check_complaint_by_order(order_id: str, db: AsyncSession = Depends(get_db)):
+async def check_complaint_by_order(order_id: str):
     """Check if a complaint exists for a given order ID"""
-    result = await db.execute(select(Complaint).filter(Complaint.order_id == order_id))
-    complaint = result.scalar_one_or_none()
-
-    if complaint:
-        return {
-            "exists": True,
-            "complaint_id": complaint.id,
-            "issue": complaint.issue,
-            "escalation_status": complaint.escalation_status
-        } 
-    else:
-        return {
-            "exists": False
-        }
+    complaint = await get_cached_complaint(
+        f"complaint_by_order:{order_id}", lambda db: repository.get_complaint_for_order(db, order_id)
+    )
+    return repository.complaint_check(complaint)
 
 @app.get("/complaints/check_by_id/{complaint_id}")
-async def check_complaint_by_id(complaint_id: str, db: AsyncSession = Depends(get_db)):
+async def check_complaint_by_id(complaint_id: str):
     """Check if a complaint exists for a given complaint ID"""
-    result = await db.execute(select(Complaint).filter(Complaint.id == complaint_id))
-    complaint = result.scalar_one_or_none()
-
-    if complaint:
-        return {
-            "exists": True,
-            "complaint_id": complaint.id,
-            "issue": complaint.issue,
-            "escalation_status": complaint.escalation_status
-        } 
-    else:
-        return {
-            "exists": False
-        }
+    complaint = await get_cached_complaint(
+        f"complaint:{complaint_id}", lambda db: repository.get_complaint(db, complaint_id)
+    )
+    return repository.complaint_check(complaint)
+
+@app.get("/reports/daily")
+async def get_daily_report(day: Optional[date] = None, db: AsyncSession = Depends(get_db)):
+    """Daily complaint/escalation summary, read from the per-day counters"""
+    return await repository.get_daily_report(db, day or datetime.utcnow().date())
+
+@app.post("/reports/daily/rebuild")
+async def rebuild_daily_reports(payload: ReportRebuildRequest, db: AsyncSession = Depends(get_write_db)):
+    """Recompute the per-day counters for a date range from the source tables"""
+    try:
+        reports = await repository.rebuild_daily_reports(db, payload.start, payload.end)
+    except RepositoryError as exc:
+        raise http_error(exc)
+    await db.commit()
+    return {"reports": reports}
+
+@app.post("/reports/daily/rollup")
+async def roll_up_daily_stats(payload: StatsRollupRequest, db: AsyncSession = Depends(get_write_db)):
+    """Fold up to limit pending counter deltas into the per-day counters (run periodically)"""
+    result = await repository.roll_up_daily_stats(db, payload.limit)
+    await db.commit()
+    return result
+
+EXPORT_COLUMNS = [
+    Complaint.id.label("complaint_id"),
+    Complaint.order_id,
+    Complaint.issue,
+    Complaint.escalation_status,
+    Complaint.created_at.label("complaint_created_at"),
+    Order.status.label("order_status"),
+    Order.estimated_delivery,
+    Escalation.id.label("escalation_id"),
+    Escalation.status.label("escalation_state"),
+    Escalation.created_at.label("escalation_created_at"),
+]
+
+def export_value(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+async def stream_complaint_export(export_format: str):
+    """Yield encoded chunks, one per server-side cursor batch, so memory stays flat"""
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .outerjoin(Order, Complaint.order_id == Order.order_id)
+        .outerjoin(Escalation, Escalation.complaint_id == Complaint.id)
+        .order_by(Complaint.id, Escalation.id)
+        .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+    header = [column.key for column in EXPORT_COLUMNS]
+
+    if export_format == "csv":
+        yield ",".join(header) + "\r\n"
+
+    async with db_session() as db:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([export_value(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(header, map(export_value, row)))) + "\n"
+                    for row in rows
+                )
+
+@app.get("/exports/complaints")
+async def export_complaints(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """Stream every complaint joined with its order and escalations as NDJSON or CSV"""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_complaint_export(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=complaints.{format}"}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics: per-route latency, status codes, in-flight requests and SQL timing"""
+    return metrics_response()
+
+@app.get("/health/startup")
+async def get_startup_health():
+    """Report how long this worker took to import and start"""
+    return startup_timings
+
+@app.get("/health/pool")
+async def get_pool_health():
+    """Report connection pool usage: connections in use, overflow and checkout wait time"""
+    return pool_status()
+
+@app.get("/health/cache")
+async def get_cache_health():
+    """Report read-through cache hit/miss counters"""
+    return response_cache.stats()
+
+IMPORT_FINISHED = perf_counter()
+startup_timings = {"import_ms": round((IMPORT_FINISHED - IMPORT_STARTED) * 1000, 1)}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Load benchmark for the API, run against a live server.
+
+Start the API on the database to measure (SQLite file or Postgres), then run:
+
+    python src/backend/benchmark.py singles --count 2000 --concurrency 32
+    python src/backend/benchmark.py bulk --count 20000 --chunk 1000
+    python src/backend/benchmark.py mixed --seconds 15 --writers 16 --readers 16
+    python src/backend/benchmark.py escalations --count 2000 --concurrency 32 --complaints 1
+
+singles files each complaint with its own POST /complaints, at most --concurrency
+requests in flight; bulk files them through POST /complaints/bulk, --chunk per
+request, one request at a time. mixed runs --writers clients filing complaints
+and --readers clients listing the order's complaints (GET /complaints) side by
+side for --seconds, and reports each side. escalations files --complaints
+complaints in one bulk request, then escalates them --count times in total, round
+robin, at most --concurrency at a time; with --complaints 1 every escalation
+updates the same complaint row. Complaints go to a seeded order (--order).
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from time import perf_counter
+from uuid import uuid4
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config import get_settings
+
+settings = get_settings()
+
+
+def summarize(scenario: str, count: int, failed: int, elapsed: float, latencies: list) -> dict:
+    latencies = sorted(latencies)
+
+    def percentile(q: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) if latencies else 0.0
+
+    return {
+        "scenario": scenario,
+        "count": count,
+        "failed": failed,
+        "total_s": round(elapsed, 3),
+        "per_s": round(count / elapsed, 1),
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def timed(latencies: list, request) -> bool:
+    """Await one request, record its latency and report whether it succeeded"""
+    started = perf_counter()
+    try:
+        response = await request
+        ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    latencies.append(perf_counter() - started)
+    return ok
+
+
+async def run_singles(client: httpx.AsyncClient, count: int, concurrency: int, order_id: str) -> dict:
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def create() -> bool:
+        payload = {"id": f"BENCH-{uuid4()}", "order_id": order_id, "issue": "Parcel late"}
+        async with slots:
+            return await timed(latencies, client.post("/complaints", json=payload))
+
+    started = perf_counter()
+    outcomes = await asyncio.gather(*(create() for _ in range(count)))
+    return summarize("singles", count, outcomes.count(False), perf_counter() - started, latencies)
+
+
+async def run_bulk(client: httpx.AsyncClient, count: int, chunk: int, order_id: str) -> dict:
+    latencies = []
+    failed = 0
+
+    started = perf_counter()
+    for start in range(0, count, chunk):
+        complaints = [
+            {"id": f"BENCH-{uuid4()}", "order_id": order_id, "issue": "Parcel late"}
+            for _ in range(min(chunk, count - start))
+        ]
+        if not await timed(latencies, client.post("/complaints/bulk", json={"complaints": complaints})):
+            failed += len(complaints)
+    result = summarize("bulk", count, failed, perf_counter() - started, latencies)
+    result["requests"] = len(latencies)
+    return result
+
+
+async def run_escalations(client: httpx.AsyncClient, count: int, concurrency: int, complaints: int,
+                          order_id: str) -> dict:
+    complaint_ids = [f"BENCH-{uuid4()}" for _ in range(complaints)]
+    response = await client.post("/complaints/bulk", json={"complaints": [
+        {"id": complaint_id, "order_id": order_id, "issue": "Parcel late"} for complaint_id in complaint_ids
+    ]})
+    response.raise_for_status()
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def escalate(complaint_id: str) -> bool:
+        async with slots:
+            return await timed(latencies, client.post("/escalations", json={"complaint_id": complaint_id}))
+
+    started = perf_counter()
+    outcomes = await asyncio.gather(*(escalate(complaint_ids[i % complaints]) for i in range(count)))
+    result = summarize("escalations", count, outcomes.count(False), perf_counter() - started, latencies)
+    result["complaints"] = complaints
+    return result
+
+
+async def run_mixed(client: httpx.AsyncClient, seconds: float, writers: int, readers: int, order_id: str) -> list:
+    write_latencies, read_latencies = [], []
+    failed = {"writes": 0, "reads": 0}
+    deadline = perf_counter() + seconds
+
+    async def write():
+        while perf_counter() < deadline:
+            payload = {"id": f"BENCH-{uuid4()}", "order_id": order_id, "issue": "Parcel late"}
+            if not await timed(write_latencies, client.post("/complaints", json=payload)):
+                failed["writes"] += 1
+
+    async def read():
+        while perf_counter() < deadline:
+            if not await timed(read_latencies, client.get("/complaints", params={"order_id": order_id, "limit": 20})):
+                failed["reads"] += 1
+
+    started = perf_counter()
+    await asyncio.gather(*(write() for _ in range(writers)), *(read() for _ in range(readers)))
+    elapsed = perf_counter() - started
+    return [
+        summarize("mixed-writes", len(write_latencies), failed["writes"], elapsed, write_latencies),
+        summarize("mixed-reads", len(read_latencies), failed["reads"], elapsed, read_latencies),
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure API write throughput against a running server")
+    parser.add_argument("scenario", choices=["singles", "bulk", "mixed", "escalations"])
+    parser.add_argument("--url", default=settings.API_BASE_URL)
+    parser.add_argument("--count", type=int, default=2000, help="Complaints to file")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight (singles, escalations)")
+    parser.add_argument("--chunk", type=int, default=1000, help="Complaints per request (bulk)")
+    parser.add_argument("--seconds", type=float, default=15.0, help="Run time (mixed)")
+    parser.add_argument("--writers", type=int, default=16, help="Clients filing complaints (mixed)")
+    parser.add_argument("--readers", type=int, default=16, help="Clients listing complaints (mixed)")
+    parser.add_argument("--complaints", type=int, default=1, help="Distinct complaints escalated (escalations)")
+    parser.add_argument("--order", default="ORD123", help="Existing order the complaints are filed against")
+    args = parser.parse_args()
+
+    connections = max(args.concurrency, args.writers + args.readers)
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120.0) as client:
+        if args.scenario == "singles":
+            results = [await run_singles(client, args.count, args.concurrency, args.order)]
+        elif args.scenario == "bulk":
+            results = [await run_bulk(client, args.count, args.chunk, args.order)]
+        elif args.scenario == "escalations":
+            results = [await run_escalations(client, args.count, args.concurrency, args.complaints, args.order)]
+        else:
+            results = await run_mixed(client, args.seconds, args.writers, args.readers, args.order)
+    for result in results:
+        print(" ".join(f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+import json
+import logging
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheBackend:
+    """In-process TTL cache (per worker), used without Redis or while it is unreachable"""
+
+    def __init__(self, max_entries: int = 10000):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        """Set key only if it is absent (or expired); True if it was set"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > monotonic():
+                return False
+            self._entries[key] = (monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            return True
+
+    async def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisCacheBackend:
+    """Shared cache in Redis, so all API workers see the same entries and invalidations"""
+
+    def __init__(self, url: str):
+        from redis import asyncio as redis_asyncio
+
+        self._client = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: int):
+        await self._client.set(key, json.dumps(value), ex=ttl)
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        """Set key only if it is absent (SET NX); True if it was set"""
+        return bool(await self._client.set(key, json.dumps(value), ex=ttl, nx=True))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*keys)
+
+
+def backend_from_settings(settings):
+    """Redis when CACHE_REDIS_URL is set, otherwise an in-process store"""
+    if settings.CACHE_REDIS_URL:
+        return RedisCacheBackend(settings.CACHE_REDIS_URL)
+    return LocalCacheBackend(settings.CACHE_LOCAL_MAX_ENTRIES)
+
+
+class ReadThroughCache:
+    """Read-through cache for JSON-serializable API responses with hit/miss counters"""
+
+    def __init__(self, backend=None, fallback: Optional[LocalCacheBackend] = None,
+                 enabled: bool = True, prefix: str = "cs:"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._fallback = fallback or LocalCacheBackend()
+        self._backend = backend or self._fallback
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "ReadThroughCache":
+        fallback = LocalCacheBackend(settings.CACHE_LOCAL_MAX_ENTRIES)
+        backend = RedisCacheBackend(settings.CACHE_REDIS_URL) if settings.CACHE_REDIS_URL else None
+        return cls(backend=backend, fallback=fallback, enabled=settings.CACHE_ENABLED)
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    async def _get(self, key: str) -> Optional[Any]:
+        try:
+            return await self._backend.get(key)
+        except Exception as exc:
+            self._count("errors")
+            logger.warning(f"Cache read failed for {key}, using local cache: {exc}")
+            return await self._fallback.get(key)
+
+    async def _set(self, key: str, value: Any, ttl: int):
+        try:
+            await self._backend.set(key, value, ttl)
+        except Exception as exc:
+            self._count("errors")
+            logger.warning(f"Cache write failed for {key}, using local cache: {exc}")
+            await self._fallback.set(key, value, ttl)
+
+    async def get_or_load(self, key: str, ttl: int, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, or call loader and cache its result"""
+        if not self.enabled:
+            return await loader()
+
+        key = self.prefix + key
+        value = await self._get(key)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        value = await loader()
+        if value is not None:
+            await self._set(key, value, ttl)
+        return value
+
+    async def invalidate(self, *keys: str):
+        """Drop entries after a write; clears the local fallback too in case it served them.
+
+        Writers with a shared Redis backend invalidate even when their own reads
+        are uncached, so a worker writing directly to the database clears what
+        the API has cached.
+        """
+        if not keys or (not self.enabled and self._backend is self._fallback):
+            return
+
+        keys = [self.prefix + key for key in keys]
+        try:
+            await self._backend.delete(*keys)
+        except Exception as exc:
+            self._count("errors")
+            logger.warning(f"Cache invalidation failed for {keys}: {exc}")
+        if self._backend is not self._fallback:
+            await self._fallback.delete(*keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "backend": type(self._backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,283 @@
+"""
+Throughput benchmark for the read-only order and complaint tasks.
+
+Start a worker with the pool to measure, then run for example:
+
+    celery -A src.backend.celery.celery_app worker --pool=threads --concurrency=32
+    python -m src.backend.celery.benchmark --task get_order_status --arg ORD123 --count 1000
+
+and repeat with --pool=prefork / --pool=solo to compare tasks per second.
+
+send_notification stores no result, so it is measured in-process instead, against
+the stub transport with a simulated round trip per call:
+
+    python -m src.backend.celery.benchmark --task send_notification --count 1000 --recipients 50
+
+The same notifications are then sent unbatched, one transport call each, with
+at most --concurrency calls in flight (one per pool thread, each blocked on its
+round trip); one_at_a_time_s is how long that took.
+
+Per-task overhead is measured in-process too, against a running API: --count
+eager get_order_status calls through the worker runtime (shared event loop and
+pooled HTTP client), then the same calls the way tasks used to make them (a new
+event loop and a new httpx.AsyncClient per call), sequentially and from
+--concurrency threads:
+
+    python -m src.backend.celery.benchmark --task overhead --count 500 --concurrency 16
+
+Broker and result-backend load is measured against a scratch Redis (it leaves
+the published messages queued): --count rounds of a 500-order batch_check_orders,
+a get_order_status and a send_notification are published, with no worker, and
+their results stored as a worker would. The output is Redis memory and bytes
+received per round. Set CELERY_TASK_SERIALIZER and
+CELERY_RESULT_COMPRESSION_THRESHOLD to compare encodings; --store-ignored also
+stores send_notification results, as every task did before per-task result
+policies:
+
+    python -m src.backend.celery.benchmark --task payloads --count 200
+
+Queue isolation is measured against running workers and API: --count
+get_order_status tasks are sent one at a time, each timed from publish to
+result, and before each one an equal share of --flood batch_check_orders tasks
+is published to the batch queue, so the backlog keeps growing. Run it with a worker per queue, and
+with --flood 0 for the unloaded baseline; --same-queue sends everything to the
+default queue, as before routing, for a single worker consuming it:
+
+    celery -A src.backend.celery.celery_app worker --pool=threads -Q interactive --concurrency=8 -n interactive@%h
+    celery -A src.backend.celery.celery_app worker --pool=threads -Q batch,default --concurrency=8 -n batch@%h
+    python -m src.backend.celery.benchmark --task isolation --flood 2000 --count 200
+"""
+import argparse
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+import httpx
+from celery import states
+from celery.result import ResultSet
+
+from src.backend.celery import notifications, tasks
+from src.backend.celery.celery_app import BATCH, celery_app
+from src.backend.celery.runtime import run_async
+from config import get_settings
+
+settings = get_settings()
+
+BENCHMARK_TASKS = {
+    "get_order_status": tasks.get_order_status,
+    "check_complaint_by_order": tasks.check_complaint_by_order,
+    "check_complaint_by_id": tasks.check_complaint_by_id,
+    "get_complaint_details": tasks.get_complaint_details,
+}
+
+
+def run(task_name: str, arg: str, count: int, timeout: float) -> dict:
+    task = BENCHMARK_TASKS[task_name]
+
+    started = perf_counter()
+    results = ResultSet([task.delay(arg) for _ in range(count)])
+    dispatched = perf_counter()
+    results.join(timeout=timeout, propagate=False)
+    finished = perf_counter()
+
+    failed = sum(1 for result in results.results if result.failed())
+    return {
+        "task": task_name,
+        "count": count,
+        "failed": failed,
+        "dispatch_s": round(dispatched - started, 3),
+        "total_s": round(finished - started, 3),
+        "tasks_per_s": round(count / (finished - started), 1),
+    }
+
+
+async def send_one_at_a_time(transport, count: int, recipients: int, concurrency: int):
+    """Every notification in its own transport call, as before buffering"""
+    threads = asyncio.Semaphore(concurrency)
+
+    async def send(i: int):
+        recipient = f"customer{i % recipients}@example.com"
+        async with threads:
+            await transport.send("email", [{
+                "recipient": recipient,
+                "channel": "email",
+                "events": [{"message_type": "benchmark", "data": {"n": i}}]
+            }])
+
+    await asyncio.gather(*(send(i) for i in range(count)))
+
+
+def run_notifications(count: int, recipients: int, latency: float, concurrency: int) -> dict:
+    buffer = notifications.get_buffer()
+    buffer.transport = notifications.StubTransport(latency=latency)
+
+    started = perf_counter()
+    for i in range(count):
+        tasks.send_notification.apply(args=(f"customer{i % recipients}@example.com", "benchmark", {"n": i}))
+    accepted = perf_counter()
+    # Close the digest window now instead of waiting for it
+    run_async(notifications.flush())
+    finished = perf_counter()
+
+    run_async(send_one_at_a_time(notifications.StubTransport(latency=latency), count, recipients, concurrency))
+    unbatched = perf_counter() - finished
+
+    return {
+        "task": "send_notification",
+        "count": count,
+        "recipients": recipients,
+        "digests": buffer.sent_digests,
+        "batches": buffer.batches,
+        "failed": buffer.failed_digests,
+        "accept_s": round(accepted - started, 3),
+        "total_s": round(finished - started, 3),
+        "notifications_per_s": round(count / (finished - started), 1),
+        "one_at_a_time_s": round(unbatched, 3),
+        "speedup": round(unbatched / (finished - started), 1),
+    }
+
+
+def fetch_with_new_loop(order_id: str) -> dict:
+    """One order lookup as tasks made it before the worker runtime"""
+    async def fetch():
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{settings.API_BASE_URL}/orders/{order_id}", timeout=10.0)
+            response.raise_for_status()
+            return response.json()
+    return asyncio.run(fetch())
+
+
+def fetch_with_runtime(order_id: str) -> dict:
+    return tasks.get_order_status.apply(args=(order_id,)).get()
+
+
+def time_calls(call, arg: str, count: int, concurrency: int) -> dict:
+    call(arg)  # Warm up: first connection, imports
+    started = perf_counter()
+    for _ in range(count):
+        call(arg)
+    sequential = perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = perf_counter()
+        list(pool.map(lambda _: call(arg), range(count)))
+        threaded = perf_counter() - started
+
+    return {
+        "per_task_ms": round(sequential / count * 1000, 2),
+        "threaded_tasks_per_s": round(count / threaded, 1),
+    }
+
+
+def run_overhead(arg: str, count: int, concurrency: int) -> dict:
+    shared = time_calls(fetch_with_runtime, arg, count, concurrency)
+    per_call = time_calls(fetch_with_new_loop, arg, count, concurrency)
+    return {
+        "task": "overhead",
+        "count": count,
+        "concurrency": concurrency,
+        "shared_loop_per_task_ms": shared["per_task_ms"],
+        "new_loop_per_task_ms": per_call["per_task_ms"],
+        "shared_loop_threaded_per_s": shared["threaded_tasks_per_s"],
+        "new_loop_threaded_per_s": per_call["threaded_tasks_per_s"],
+    }
+
+
+def run_payloads(count: int, store_ignored: bool) -> dict:
+    client = celery_app.backend.client
+    orders = [{"order_id": f"ORD{i:06d}", "status": "Shipped", "estimated_delivery": "2025-07-20"} for i in range(500)]
+    round_trip = [
+        (tasks.batch_check_orders, ([order["order_id"] for order in orders],),
+         {"total": len(orders), "results": [{"order_id": order["order_id"], "status": "success", "data": order} for order in orders]}),
+        (tasks.get_order_status, (orders[0]["order_id"],), orders[0]),
+        (tasks.send_notification, ("customer@example.com", "order_update", {"order": orders[0]}), None),
+    ]
+
+    memory_before = client.info("memory")["used_memory"]
+    received_before = client.info("stats")["total_net_input_bytes"]
+    for _ in range(count):
+        for task, args, result in round_trip:
+            task_id = task.apply_async(args).id
+            if store_ignored or not task.ignore_result:
+                celery_app.backend.store_result(task_id, result, states.SUCCESS)
+    memory = client.info("memory")["used_memory"] - memory_before
+    received = client.info("stats")["total_net_input_bytes"] - received_before
+
+    return {
+        "task": "payloads",
+        "serializer": celery_app.conf.task_serializer,
+        "result_serializer": celery_app.conf.result_serializer,
+        "store_ignored": store_ignored,
+        "count": count,
+        "memory_per_round": memory // count,
+        "received_per_round": received // count,
+    }
+
+
+def queued(queue: str) -> int:
+    with celery_app.connection_for_write() as conn:
+        return conn.default_channel.queue_declare(queue=queue).message_count
+
+
+def run_isolation(arg: str, count: int, flood: int, same_queue: bool, timeout: float) -> dict:
+    # One queue at one priority: first in, first out, as before routing
+    options = {"queue": "default", "priority": 0} if same_queue else {}
+    latencies = []
+    for _ in range(count):
+        for _ in range(flood // count):
+            tasks.batch_check_orders.apply_async(([arg] * 200,), **options)
+        started = perf_counter()
+        tasks.get_order_status.apply_async((arg,), **options).get(timeout=timeout)
+        latencies.append(perf_counter() - started)
+    latencies.sort()
+
+    return {
+        "task": "isolation",
+        "flood": flood,
+        "same_queue": same_queue,
+        "count": count,
+        "p50_ms": round(latencies[count // 2] * 1000, 1),
+        "p99_ms": round(latencies[min(count - 1, int(count * 0.99))] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "flood_still_queued": queued("default" if same_queue else BATCH),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Celery task throughput against a running worker")
+    parser.add_argument("--task", choices=sorted(BENCHMARK_TASKS) + ["send_notification", "overhead", "payloads", "isolation"],
+                        default="get_order_status")
+    parser.add_argument("--arg", default="ORD123", help="Order or complaint ID passed to every task")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--recipients", type=int, default=50, help="Distinct recipients (send_notification)")
+    parser.add_argument("--latency", type=float, default=2.0, help="Simulated seconds per transport call (send_notification)")
+    parser.add_argument("--concurrency", type=int, default=settings.CELERY_WORKER_CONCURRENCY,
+                        help="Pool threads sending in the unbatched run (send_notification) or calling (overhead)")
+    parser.add_argument("--store-ignored", action="store_true",
+                        help="Also store results of ignore_result tasks, as before per-task policies (payloads)")
+    parser.add_argument("--flood", type=int, default=2000, help="batch_check_orders tasks queued first (isolation)")
+    parser.add_argument("--same-queue", action="store_true",
+                        help="Send the flood and the timed tasks to the default queue, as before routing (isolation)")
+    args = parser.parse_args()
+
+    if args.task == "send_notification":
+        result = run_notifications(args.count, args.recipients, args.latency, args.concurrency)
+    elif args.task == "isolation":
+        result = run_isolation(args.arg, args.count, args.flood, args.same_queue, args.timeout)
+    elif args.task == "payloads":
+        result = run_payloads(args.count, args.store_ignored)
+    elif args.task == "overhead":
+        celery_app.conf.task_always_eager = True
+        result = run_overhead(args.arg, args.count, args.concurrency)
+    else:
+        result = run(args.task, args.arg, args.count, args.timeout)
+    print(" ".join(f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
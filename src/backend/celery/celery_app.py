@@ -1,22 +1,65 @@
-from celery import Celery
+import logging
+
+from celery import Celery, Task
+from celery.backends.base import KeyValueStoreBackend
+from celery.schedules import crontab
+from kombu import Queue
 from config import get_settings
+from src.backend.celery.serialization import base_serializer, register_compact_serializer
 
 settings = get_settings()
+logger = logging.getLogger("celery.task")
+
+
+class PolicyTask(Task):
+    """
+    Task with a per-task result policy: ignore_result for fire-and-forget tasks,
+    or result_ttl to keep a result for less than the global result_expires.
+    """
+    result_ttl = None
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        # Only key-value result stores (Redis, cache) have per-key expiry
+        if self.result_ttl and not self.ignore_result and isinstance(self.backend, KeyValueStoreBackend):
+            try:
+                self.backend.expire(self.backend.get_key_for_task(task_id), self.result_ttl)
+            except Exception as exc:
+                logger.warning(f"Could not shorten result TTL for {self.name}[{task_id}]: {exc}")
+
 
 celery_app = Celery(
     "customer_service",
     broker = settings.CELERY_BROKER_URL,
     backend = settings.CELERY_RESULT_BACKEND,
+    task_cls = PolicyTask,
     include = [
         "src.backend.celery.tasks"
     ]
 )
 
+if settings.METRICS_ENABLED:
+    # Connects the signal handlers in publishers (publish time) and workers
+    import src.backend.celery.telemetry  # noqa: F401
+
+serializer = base_serializer(settings.CELERY_TASK_SERIALIZER)
+# Results are the large payloads (batch lookups, reports); compress those above the threshold
+result_serializer = (
+    register_compact_serializer(serializer, settings.CELERY_RESULT_COMPRESSION_THRESHOLD)
+    if settings.CELERY_RESULT_COMPRESSION_THRESHOLD else serializer
+)
+
 celery_app.conf.update(
-    task_serializer=settings.CELERY_TASK_SERIALIZER,
-    result_serializer=settings.CELERY_TASK_SERIALIZER,
+    task_serializer=serializer,
+    result_serializer=result_serializer,
+    # JSON stays accepted so clients and workers can switch serializers one at a time
     accept_content=[
-        settings.CELERY_TASK_SERIALIZER
+        "json",
+        serializer
+    ],
+    result_accept_content=[
+        "json",
+        serializer,
+        result_serializer
     ],
 
     # Task safety - Late acknowledgment prevents task loss on worker crash
@@ -27,10 +70,13 @@ celery_app.conf.update(
 
     # Result backend - Store results for status tracking
     task_ignore_result=False,
-    result_expires=3600,
+    result_expires=settings.CELERY_RESULT_EXPIRES,
 
     # Worker settings
+    worker_pool=settings.CELERY_WORKER_POOL,
     worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    # Reserve only what the pool can run, so queued work is not held behind a busy worker
+    worker_prefetch_multiplier=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
 
     # Connection settings for better reliability
     broker_connection_retry_on_startup=True,
@@ -39,4 +85,68 @@ celery_app.conf.update(
     worker_cancel_long_running_tasks_on_connection_loss=True,
 )
 
-celery_app.conf.task_default_queue = "default"
\ No newline at end of file
+celery_app.conf.task_default_queue = "default"
+
+# Live agent lookups and writes, bulk work and scheduled maintenance use separate
+# queues, so a batch backlog never sits in front of a customer's request. Run a
+# worker per queue (see docker-compose.yml) to size each pool independently.
+INTERACTIVE = "interactive"
+BATCH = "batch"
+MAINTENANCE = "maintenance"
+
+# Broker-level priority for workers that consume several queues.
+# On Redis, lower values are delivered first.
+QUEUE_PRIORITIES = {INTERACTIVE: 0, BATCH: 5, MAINTENANCE: 9}
+
+def route(queue: str) -> dict:
+    return {"queue": queue, "priority": QUEUE_PRIORITIES[queue]}
+
+celery_app.conf.task_queues = [
+    Queue(INTERACTIVE),
+    Queue(BATCH),
+    Queue(MAINTENANCE),
+    Queue("default"),
+]
+celery_app.conf.broker_transport_options = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+celery_app.conf.task_routes = {
+    "tasks.check_complaint_by_id": route(INTERACTIVE),
+    "tasks.check_complaint_by_order": route(INTERACTIVE),
+    "tasks.create_complaint": route(INTERACTIVE),
+    "tasks.ensure_complaint": route(INTERACTIVE),
+    "tasks.get_complaint_details": route(INTERACTIVE),
+    "tasks.get_order_status": route(INTERACTIVE),
+    "tasks.escalate_complaint": route(INTERACTIVE),
+    "tasks.process_complaint_workflow": route(BATCH),
+    "tasks.batch_check_orders": route(BATCH),
+    "tasks.merge_batch_results": route(BATCH),
+    "tasks.send_notification": route(BATCH),
+    "tasks.deliver_notification": route(BATCH),
+    "tasks.generate_daily_report": route(MAINTENANCE),
+    "tasks.regenerate_daily_reports": route(MAINTENANCE),
+    "tasks.publish_daily_report": route(MAINTENANCE),
+    "tasks.roll_up_daily_stats": route(MAINTENANCE),
+    "tasks.sweep_stale_escalations": route(MAINTENANCE),
+}
+
+# Periodic work, run by `celery beat` (one instance per deployment)
+celery_app.conf.beat_schedule = {
+    "publish-daily-report": {
+        "task": "tasks.publish_daily_report",
+        "schedule": crontab.from_string(settings.CELERY_DAILY_REPORT_CRON),
+    },
+    "roll-up-daily-stats": {
+        "task": "tasks.roll_up_daily_stats",
+        "schedule": settings.DAILY_STATS_ROLLUP_INTERVAL_SECONDS,
+        "options": {"expires": settings.DAILY_STATS_ROLLUP_INTERVAL_SECONDS},
+    },
+    "sweep-stale-escalations": {
+        "task": "tasks.sweep_stale_escalations",
+        "schedule": settings.ESCALATION_SWEEP_INTERVAL_SECONDS,
+        # A run that waited a whole interval is superseded by the next one
+        "options": {"expires": settings.ESCALATION_SWEEP_INTERVAL_SECONDS},
+    },
+}
\ No newline at end of file
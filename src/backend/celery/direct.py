@@ -0,0 +1,148 @@
+"""
+Direct-DB versions of the task helpers, used when CELERY_TASK_DATA_ACCESS=direct.
+They make the same repository calls as the API handlers, on the worker's own
+engine, and return the same payloads the HTTP endpoints do, so a task does one
+DB round trip instead of worker -> API -> DB with JSON in between.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import get_settings
+from src.backend.cache import ReadThroughCache
+from src.backend.memory import repository
+from src.backend.memory.base import async_engine, async_write_engine
+from src.backend.memory.repository import AlreadyExistsError, NotFoundError, RepositoryError, complaint_cache_keys
+
+settings = get_settings()
+logger = logging.getLogger("celery.task")
+
+SessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+WriteSessionLocal = async_sessionmaker(async_write_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Writes here bypass the API, so they drop the API's cached entries themselves;
+# this only reaches the API workers when the cache is shared (CACHE_REDIS_URL)
+response_cache = ReadThroughCache.from_settings(settings)
+
+
+def not_found(detail: str) -> dict:
+    return {"error": detail, "status_code": 404}
+
+
+async def check_complaint_by_id(complaint_id: str) -> dict:
+    async with SessionLocal() as db:
+        return repository.complaint_check(await repository.get_complaint(db, complaint_id))
+
+
+async def check_complaint_by_order(order_id: str) -> dict:
+    async with SessionLocal() as db:
+        return repository.complaint_check(await repository.get_complaint_for_order(db, order_id))
+
+
+async def create_complaint(complaint_id: str, order_id: str, issue: str) -> dict:
+    try:
+        async with WriteSessionLocal() as db:
+            await repository.create_complaint(db, complaint_id, order_id, issue)
+            await db.commit()
+    except AlreadyExistsError:
+        # A retry whose first attempt committed finds its own complaint: report
+        # the original success rather than a duplicate
+        existing = await get_complaint_details(complaint_id)
+        if existing.get("order_id") != order_id or existing.get("issue") != issue:
+            return {"error": "Complaint already exists", "status_code": 400}
+    except NotFoundError as exc:
+        return not_found(exc.detail)
+
+    await response_cache.invalidate(*complaint_cache_keys(complaint_id, order_id))
+    return {"message": "Complaint created successfully", "complaint_id": complaint_id}
+
+
+async def ensure_complaint(complaint_id: str, order_id: str, issue: str) -> dict:
+    try:
+        async with WriteSessionLocal() as db:
+            result = await repository.ensure_complaint(db, complaint_id, order_id, issue)
+            await db.commit()
+    except NotFoundError as exc:
+        return not_found(exc.detail)
+
+    if result["created"]:
+        await response_cache.invalidate(*complaint_cache_keys(result["complaint_id"], result["order_id"]))
+    return result
+
+
+async def get_complaint_details(complaint_id: str) -> dict:
+    async with SessionLocal() as db:
+        complaint = await repository.get_complaint(db, complaint_id)
+    return complaint or not_found("Complaint not found")
+
+
+async def get_order_status(order_id: str) -> dict:
+    async with SessionLocal() as db:
+        order = await repository.get_order(db, order_id)
+    return order or not_found("Order not found")
+
+
+async def lookup_orders(order_ids: list) -> dict:
+    async with SessionLocal() as db:
+        return await repository.lookup_orders(db, order_ids)
+
+
+async def escalate_complaint(complaint_id: str, escalation_id: Optional[str] = None) -> dict:
+    """escalation_id makes retries idempotent: a replay finds the committed escalation"""
+    try:
+        async with WriteSessionLocal() as db:
+            escalation_id, order_id = await repository.escalate_complaint(db, complaint_id, escalation_id)
+            await db.commit()
+    except NotFoundError as exc:
+        return not_found(exc.detail)
+
+    await response_cache.invalidate(*complaint_cache_keys(complaint_id, order_id))
+    return {"message": "Complaint escalated successfully", "escalation_id": escalation_id}
+
+
+async def generate_daily_report(day: Optional[str] = None) -> dict:
+    report_day = date.fromisoformat(day) if day else datetime.utcnow().date()
+    async with SessionLocal() as db:
+        return await repository.get_daily_report(db, report_day)
+
+
+async def regenerate_daily_reports(start: str, end: str) -> dict:
+    try:
+        async with WriteSessionLocal() as db:
+            reports = await repository.rebuild_daily_reports(db, date.fromisoformat(start), date.fromisoformat(end))
+            await db.commit()
+    except (RepositoryError, ValueError) as exc:
+        logger.warning(f"Invalid report range {start}..{end}: {exc}")
+        return {"error": "Invalid date range", "status_code": 400}
+    return {"reports": reports}
+
+
+async def roll_up_daily_stats(limit: int) -> dict:
+    async with WriteSessionLocal() as db:
+        result = await repository.roll_up_daily_stats(db, limit)
+        await db.commit()
+    return result
+
+
+async def run_complaint_workflow(order_id: str, issue: str, complaint_id: str) -> dict:
+    async with WriteSessionLocal() as db:
+        report = await repository.run_complaint_workflow(db, order_id, issue, complaint_id)
+        await db.commit()
+
+    if report.get("completed"):
+        await response_cache.invalidate(*complaint_cache_keys(complaint_id, order_id))
+    return report
+
+
+async def sweep_stale_escalations(older_than_minutes: int, limit: int) -> dict:
+    async with SessionLocal() as db:
+        return await repository.sweep_stale_escalations(db, timedelta(minutes=older_than_minutes), limit)
+
+
+async def advance_sweep(last_created_at: str, last_id: str) -> dict:
+    async with WriteSessionLocal() as db:
+        advanced = await repository.advance_sweep(db, datetime.fromisoformat(last_created_at), last_id)
+        await db.commit()
+    return {"advanced": advanced}
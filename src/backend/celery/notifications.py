@@ -0,0 +1,202 @@
+"""
+Notification pipeline for send_notification: tasks only hand the notification to
+a per-process buffer and return. The buffer groups notifications by recipient
+and channel, and when the digest window closes, sends each group as one digest,
+in batches, through an async transport.
+
+A batch the transport rejects is retried with exponential backoff, up to
+NOTIFICATION_MAX_ATTEMPTS, and only then dropped (and logged).
+
+The buffer lives on the runtime's event loop (see runtime.py) and is only
+touched from it, so pool threads share it without locking. It is in memory:
+notifications still buffered or waiting for a retry when a worker is killed
+are lost (their task messages are already acknowledged); a clean shutdown
+flushes it, retries included.
+
+Alerts that must not be lost go through deliver_notification instead, which
+sends through the same transport before its task message is acknowledged.
+"""
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from celery.signals import worker_process_init
+
+from config import get_settings
+from src.backend.celery.runtime import get_http_client, on_shutdown, raise_for_status
+
+settings = get_settings()
+logger = logging.getLogger("celery.task")
+
+
+class StubTransport:
+    """Local transport for development and tests: records digests instead of sending them"""
+
+    def __init__(self, latency: float = 0.0, keep: int = 1000):
+        self.latency = latency  # Simulated round trip per batch, in seconds
+        self.sent = deque(maxlen=keep)
+
+    async def send(self, channel: str, digests: list):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent.extend(digests)
+        for digest in digests:
+            logger.debug(f"[stub] {channel} digest to {digest['recipient']}: {len(digest['events'])} event(s)")
+
+
+class WebhookTransport:
+    """POSTs each batch as JSON to an email/SMS gateway or relay"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def send(self, channel: str, digests: list):
+        client = get_http_client()
+        response = await client.post(self.url, json={"channel": channel, "digests": digests}, timeout=30.0)
+        raise_for_status(response)
+
+
+def transport_from_settings(settings):
+    """The webhook when NOTIFICATION_WEBHOOK_URL is set, otherwise the local stub"""
+    if settings.NOTIFICATION_WEBHOOK_URL:
+        return WebhookTransport(settings.NOTIFICATION_WEBHOOK_URL)
+    return StubTransport(settings.NOTIFICATION_STUB_LATENCY_MS / 1000)
+
+
+class NotificationBuffer:
+    """Collects notifications per (recipient, channel) and sends them as digests, in batches"""
+
+    def __init__(self, transport, window: float, batch_size: int, max_buffered: int = 10000,
+                 max_attempts: int = 5, retry_backoff: float = 2.0):
+        self.transport = transport
+        self.window = window
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff  # Delay before the first retry, doubled for each next one
+        self._pending = {}
+        self._buffered = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+        self.received = 0
+        self.sent_digests = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed_digests = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "NotificationBuffer":
+        return cls(
+            transport_from_settings(settings),
+            window=settings.NOTIFICATION_DIGEST_WINDOW_SECONDS,
+            batch_size=settings.NOTIFICATION_BATCH_SIZE,
+            max_buffered=settings.NOTIFICATION_MAX_BUFFERED,
+            max_attempts=settings.NOTIFICATION_MAX_ATTEMPTS,
+            retry_backoff=settings.NOTIFICATION_RETRY_BACKOFF_SECONDS
+        )
+
+    def add(self, recipient: str, channel: str, message_type: str, data: dict):
+        self.received += 1
+        self._buffered += 1
+        self._pending.setdefault((recipient, channel), []).append({
+            "message_type": message_type,
+            "data": data,
+            "queued_at": datetime.utcnow().isoformat()
+        })
+        # The window starts with the first event; a full buffer closes it early
+        if self._buffered >= self.max_buffered:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._start_flush)
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self._buffered = 0
+        flush = asyncio.get_running_loop().create_task(self._send(pending))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _send(self, pending: dict):
+        by_channel = {}
+        for (recipient, channel), events in pending.items():
+            by_channel.setdefault(channel, []).append({
+                "recipient": recipient,
+                "channel": channel,
+                "events": events
+            })
+
+        batches = [
+            (channel, digests[start:start + self.batch_size])
+            for channel, digests in by_channel.items()
+            for start in range(0, len(digests), self.batch_size)
+        ]
+        await asyncio.gather(*(self._send_batch(channel, batch) for channel, batch in batches))
+
+    async def _send_batch(self, channel: str, digests: list):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self.transport.send(channel, digests)
+                break
+            except Exception as exc:
+                recipients = ", ".join(digest["recipient"] for digest in digests[:5])
+                if attempt == self.max_attempts:
+                    self.failed_digests += len(digests)
+                    logger.error(f"Dropping {len(digests)} {channel} digests ({recipients}, ...) after {attempt} attempts: {exc}")
+                    return
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                self.retries += 1
+                logger.warning(f"Failed to send {len(digests)} {channel} digests ({recipients}, ...), retrying in {delay:g}s: {exc}")
+                await asyncio.sleep(delay)
+        self.batches += 1
+        self.sent_digests += len(digests)
+        logger.info(f"Sent {len(digests)} {channel} digests ({sum(len(d['events']) for d in digests)} notifications)")
+
+    async def flush(self):
+        """Send everything buffered now and wait for all sends in flight"""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+
+
+_buffer: Optional[NotificationBuffer] = None
+
+
+def get_buffer() -> NotificationBuffer:
+    global _buffer
+    if _buffer is None:
+        _buffer = NotificationBuffer.from_settings(settings)
+    return _buffer
+
+
+async def enqueue(recipient: str, channel: str, message_type: str, data: dict):
+    get_buffer().add(recipient, channel, message_type, data)
+
+
+async def deliver(recipient: str, channel: str, message_type: str, data: dict):
+    """Send one notification now, as a single-event digest; raises if the transport fails"""
+    digest = {
+        "recipient": recipient,
+        "channel": channel,
+        "events": [{"message_type": message_type, "data": data, "queued_at": datetime.utcnow().isoformat()}]
+    }
+    await get_buffer().transport.send(channel, [digest])
+
+
+@on_shutdown
+async def flush():
+    if _buffer is not None:
+        await _buffer.flush()
+
+
+@worker_process_init.connect
+def reset_buffer(**kwargs):
+    # A forked child starts with an empty buffer on its own loop
+    global _buffer
+    _buffer = None
@@ -0,0 +1,139 @@
+"""
+Per-process async runtime for Celery tasks: one long-lived event loop and one
+pooled keep-alive HTTP client, reused by every task instead of asyncio.run()
+and a new client per call.
+
+The loop runs in its own background thread and tasks submit their coroutine to
+it, so it works the same under the prefork, solo and threads pools. With
+--pool=threads, every worker thread's task is in flight on the one loop at the
+same time, sharing its HTTP connections and DB pool.
+"""
+import asyncio
+import logging
+import sys
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import Lock, Thread
+
+import httpx
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("celery.task")
+
+_loop = None
+_loop_thread = None
+_loop_lock = Lock()
+_http_client = None
+_shutdown_hooks = []
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The process's event loop, started in a daemon thread on first use"""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed() or not _loop_thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = Thread(target=_loop.run_forever, name="celery-asyncio", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_async(coro):
+    """Run a task coroutine on the process's event loop and wait for its result.
+    Safe to call from several pool threads at once."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        # The threads pool cannot enforce task_time_limit, so bound the wait here
+        return future.result(timeout=settings.CELERY_TASK_TIME_LIMIT)
+    except FutureTimeoutError:
+        future.cancel()
+        raise
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class RetryableHTTPError(httpx.HTTPStatusError):
+    """An error response that may succeed on retry: a server error or 429"""
+
+
+def raise_for_status(response: httpx.Response):
+    """response.raise_for_status(), but 5xx and 429 raise RetryableHTTPError, so
+    tasks retry those and fail fast on other client errors"""
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code >= 500 or exc.response.status_code == 429:
+            raise RetryableHTTPError(str(exc), request=exc.request, response=exc.response) from None
+        raise
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client; connections to the API are reused across tasks.
+    Called from coroutines, i.e. on the loop thread."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        http2 = settings.CELERY_HTTP2
+        if http2 and not _http2_available():
+            logger.warning("CELERY_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            timeout=10.0,
+            limits=httpx.Limits(
+                max_connections=settings.CELERY_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.CELERY_HTTP_MAX_KEEPALIVE
+            )
+        )
+    return _http_client
+
+
+def on_shutdown(hook):
+    """Register a coroutine function to run on the loop before it stops, e.g. to
+    drain a buffer. Usable as a decorator."""
+    _shutdown_hooks.append(hook)
+    return hook
+
+
+@worker_process_init.connect
+def init_worker_runtime(**kwargs):
+    global _loop, _loop_thread, _http_client
+    # A forked child must not reuse the parent's loop or sockets, and the
+    # parent's loop thread does not exist in the child
+    _loop = None
+    _loop_thread = None
+    _http_client = None
+    # Likewise for DB connections (direct mode): drop the inherited pool without closing it
+    base = sys.modules.get("src.backend.memory.base")
+    if base is not None:
+        base.async_engine.sync_engine.dispose(close=False)
+        base.async_write_engine.sync_engine.dispose(close=False)
+    get_loop()
+    logger.info("Worker process runtime initialized (event loop thread)")
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_worker_runtime(**kwargs):
+    global _http_client
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            return
+        for hook in _shutdown_hooks:
+            try:
+                asyncio.run_coroutine_threadsafe(hook(), _loop).result(timeout=30)
+            except Exception as exc:
+                logger.warning(f"Shutdown hook {hook.__qualname__} failed: {exc}")
+        if _http_client is not None:
+            asyncio.run_coroutine_threadsafe(_http_client.aclose(), _loop).result(timeout=10)
+            _http_client = None
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop_thread.join(timeout=10)
+        _loop.close()
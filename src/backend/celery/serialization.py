@@ -0,0 +1,63 @@
+"""
+Message and result encoding for Celery: JSON or msgpack, with optional zlib
+compression of payloads above a size threshold. Small results (most lookups) are
+stored as-is, so compression only costs CPU where it saves memory.
+"""
+import logging
+import zlib
+
+from kombu.serialization import dumps, loads, registry
+
+logger = logging.getLogger("celery.task")
+
+# First byte of a compact payload: stored raw or zlib-compressed
+RAW = b"r"
+COMPRESSED = b"z"
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/x-msgpack",
+}
+
+
+def _msgpack_available() -> bool:
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def base_serializer(name: str) -> str:
+    """The configured serializer, falling back to JSON when msgpack is not installed"""
+    if name == "msgpack" and not _msgpack_available():
+        logger.warning("CELERY_TASK_SERIALIZER is msgpack but the msgpack package is missing; using json")
+        return "json"
+    return name
+
+
+def register_compact_serializer(base: str, threshold: int) -> str:
+    """Register "compact-<base>": <base> encoding, zlib-compressed when at least
+    threshold bytes. Returns the serializer name."""
+    name = f"compact-{base}"
+    content_type = CONTENT_TYPES[base]
+
+    def encode(value) -> bytes:
+        _, _, payload = dumps(value, serializer=base)
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if len(payload) >= threshold:
+            return COMPRESSED + zlib.compress(payload)
+        return RAW + payload
+
+    def decode(data) -> object:
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        marker, payload = data[:1], data[1:]
+        if marker == COMPRESSED:
+            payload = zlib.decompress(payload)
+        # The compact content type itself was already checked against accept_content
+        return loads(payload, content_type, "binary" if base == "msgpack" else "utf-8", force=True)
+
+    registry.register(name, encode, decode, content_type=f"{content_type}+compact", content_encoding="binary")
+    return name
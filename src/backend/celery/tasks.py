@@ -6,84 +6,103 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.backend.celery.celery_app import celery_app
+from src.backend.celery import notifications
+from src.backend.celery.runtime import RetryableHTTPError, get_http_client, raise_for_status, run_async
 from config import get_settings
-import logging
-from time import sleep
-from datetime import datetime
+from celery import chord
+from sqlalchemy.exc import InterfaceError, OperationalError
+from datetime import datetime, timedelta
 import asyncio
+import httpx
+import logging
 
 settings = get_settings()
 logger = logging.getLogger("celery.task")
 
+# In direct mode tasks query the database through the shared repository
+# instead of calling the API over HTTP
+DIRECT_DB = settings.CELERY_TASK_DATA_ACCESS == "direct"
+if DIRECT_DB:
+    from src.backend.celery import direct
+
+# Each task execution makes one attempt. Failed calls to the API (or the DB) are retried by
+# Celery with a countdown (exponential backoff, full jitter, capped), so the
+# worker slot is free for other tasks while a failing downstream recovers. Only
+# 5xx and 429 responses are retried (see raise_for_status); other 4xx fail at once.
+RETRYABLE_ERRORS = (httpx.RequestError, RetryableHTTPError, OperationalError, InterfaceError)
+
+RETRY_POLICY = {
+    "autoretry_for": RETRYABLE_ERRORS,
+    # CELERY_TASK_MAX_RETRIES counts attempts, including the first one
+    "max_retries": max(settings.CELERY_TASK_MAX_RETRIES - 1, 0),
+    "default_retry_delay": settings.CELERY_TASK_RETRY_DELAY,
+    "retry_backoff": settings.CELERY_TASK_RETRY_DELAY,
+    "retry_backoff_max": settings.CELERY_TASK_RETRY_BACKOFF_MAX,
+    "retry_jitter": True,
+}
+
+def _raise_if_retrying(self, exc: Exception):
+    """Re-raise a retryable error while attempts remain, so Celery retries the task;
+    on the last attempt the caller records the failure instead"""
+    if isinstance(exc, RETRYABLE_ERRORS) and self.request.retries < self.max_retries:
+        raise exc
+
 # ============================================================================
 # COMPLAINT TASKS
 # ============================================================================
 
-@celery_app.task(bind=True, name="tasks.check_complaint_by_id")
+@celery_app.task(bind=True, name="tasks.check_complaint_by_id", result_ttl=settings.CELERY_LOOKUP_RESULT_TTL, **RETRY_POLICY)
 def check_complaint_by_id(self, complaint_id: str):
     """Check if a complaint exists by complaint ID"""
-    return asyncio.run(_check_complaint_by_id(self, complaint_id))
+    return run_async(_check_complaint_by_id(self, complaint_id))
 
 async def _check_complaint_by_id(self, complaint_id: str):
-    import httpx
+    if DIRECT_DB:
+        return await direct.check_complaint_by_id(complaint_id)
 
     url = f"{settings.API_BASE_URL}/complaints/check_by_id/{complaint_id}"
-    max_retries = settings.CELERY_TASK_MAX_RETRIES
-    retry_delay = settings.CELERY_TASK_RETRY_DELAY
-
-    for attempt in range(max_retries):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Successfully checked complaint {complaint_id}: exists={data.get('exists')}")
-                return data
-        except (httpx.RequestError, httpx.HTTPStatusError) as exc:
-            logger.error(f"Attempt {attempt + 1} failed for complaint_id {complaint_id}: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                logger.error(f"All {max_retries} attempts failed for complaint_id {complaint_id}.")
-                raise
-
-
-@celery_app.task(bind=True, name="tasks.check_complaint_by_order")
+    try:
+        client = get_http_client()
+        response = await client.get(url, timeout=10.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Successfully checked complaint {complaint_id}: exists={data.get('exists')}")
+        return data
+    except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed for complaint_id {complaint_id}: {exc}")
+        raise
+
+
+@celery_app.task(bind=True, name="tasks.check_complaint_by_order", result_ttl=settings.CELERY_LOOKUP_RESULT_TTL, **RETRY_POLICY)
 def check_complaint_by_order(self, order_id: str):
     """Check if a complaint exists for a given order ID"""
-    return asyncio.run(_check_complaint_by_order(self, order_id))
+    return run_async(_check_complaint_by_order(self, order_id))
 
 async def _check_complaint_by_order(self, order_id: str):
-    import httpx
+    if DIRECT_DB:
+        return await direct.check_complaint_by_order(order_id)
 
     url = f"{settings.API_BASE_URL}/complaints/check_by_order/{order_id}"
-    max_retries = settings.CELERY_TASK_MAX_RETRIES
-    retry_delay = settings.CELERY_TASK_RETRY_DELAY
-
-    for attempt in range(max_retries):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Successfully checked complaint for order {order_id}: exists={data.get('exists')}")
-                return data
-        except (httpx.RequestError, httpx.HTTPStatusError) as exc:
-            logger.error(f"Attempt {attempt + 1} failed for order_id {order_id}: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                logger.error(f"All {max_retries} attempts failed for order_id {order_id}.")
-                raise
-
-
-@celery_app.task(bind=True, name="tasks.create_complaint")
+    try:
+        client = get_http_client()
+        response = await client.get(url, timeout=10.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Successfully checked complaint for order {order_id}: exists={data.get('exists')}")
+        return data
+    except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed for order_id {order_id}: {exc}")
+        raise
+
+
+@celery_app.task(bind=True, name="tasks.create_complaint", **RETRY_POLICY)
 def create_complaint(self, complaint_id: str, order_id: str, issue: str):
     """Create a new complaint asynchronously"""
-    return asyncio.run(_create_complaint(self, complaint_id, order_id, issue))
+    return run_async(_create_complaint(self, complaint_id, order_id, issue))
 
 async def _create_complaint(self, complaint_id: str, order_id: str, issue: str):
-    import httpx
+    if DIRECT_DB:
+        return await direct.create_complaint(complaint_id, order_id, issue)
 
     url = f"{settings.API_BASE_URL}/complaints"
     payload = {
@@ -91,292 +110,478 @@ async def _create_complaint(self, complaint_id: str, order_id: str, issue: str):
         "order_id": order_id,
         "issue": issue
     }
-    max_retries = settings.CELERY_TASK_MAX_RETRIES
-    retry_delay = settings.CELERY_TASK_RETRY_DELAY
-
-    for attempt in range(max_retries):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Successfully created complaint {complaint_id} for order {order_id}")
-                return data
-        except httpx.HTTPStatusError as exc:
-            if exc.response.status_code == 400:
-                logger.warning(f"Complaint {complaint_id} already exists")
-                return {"error": "Complaint already exists", "status_code": 400}
-            logger.error(f"Attempt {attempt + 1} failed to create complaint: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                raise
-        except httpx.RequestError as exc:
-            logger.error(f"Attempt {attempt + 1} failed with request error: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                raise
-
-
-@celery_app.task(bind=True, name="tasks.get_complaint_details")
+    # Retries reuse the task ID as Idempotency-Key, so a retry after a lost
+    # response replays the original result instead of failing as a duplicate
+    headers = {"Idempotency-Key": self.request.id} if self.request.id else {}
+    try:
+        client = get_http_client()
+        response = await client.post(url, json=payload, headers=headers, timeout=10.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Successfully created complaint {complaint_id} for order {order_id}")
+        return data
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 400:
+            logger.warning(f"Complaint {complaint_id} already exists")
+            return {"error": "Complaint already exists", "status_code": 400}
+        logger.error(f"Attempt {self.request.retries + 1} failed to create complaint: {exc}")
+        raise
+    except httpx.RequestError as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed with request error: {exc}")
+        raise
+
+
+@celery_app.task(bind=True, name="tasks.ensure_complaint", **RETRY_POLICY)
+def ensure_complaint(self, complaint_id: str, order_id: str, issue: str):
+    """Create a complaint or return the one already filed for this order"""
+    return run_async(_ensure_complaint(self, complaint_id, order_id, issue))
+
+async def _ensure_complaint(self, complaint_id: str, order_id: str, issue: str):
+    if DIRECT_DB:
+        return await direct.ensure_complaint(complaint_id, order_id, issue)
+
+    url = f"{settings.API_BASE_URL}/complaints/ensure"
+    payload = {
+        "id": complaint_id,
+        "order_id": order_id,
+        "issue": issue
+    }
+    try:
+        client = get_http_client()
+        response = await client.post(url, json=payload, timeout=10.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Ensured complaint {data.get('complaint_id')} for order {order_id}: created={data.get('created')}")
+        return data
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 404:
+            logger.warning(f"Order {order_id} not found")
+            return {"error": "Order not found", "status_code": 404}
+        logger.error(f"Attempt {self.request.retries + 1} failed to ensure complaint: {exc}")
+        raise
+    except httpx.RequestError as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed with request error: {exc}")
+        raise
+
+
+@celery_app.task(bind=True, name="tasks.get_complaint_details", result_ttl=settings.CELERY_LOOKUP_RESULT_TTL, **RETRY_POLICY)
 def get_complaint_details(self, complaint_id: str):
     """Get full complaint details by ID"""
-    return asyncio.run(_get_complaint_details(self, complaint_id))
+    return run_async(_get_complaint_details(self, complaint_id))
 
 async def _get_complaint_details(self, complaint_id: str):
-    import httpx
+    if DIRECT_DB:
+        return await direct.get_complaint_details(complaint_id)
 
     url = f"{settings.API_BASE_URL}/complaints/{complaint_id}"
-    max_retries = settings.CELERY_TASK_MAX_RETRIES
-    retry_delay = settings.CELERY_TASK_RETRY_DELAY
-
-    for attempt in range(max_retries):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Successfully retrieved complaint details for {complaint_id}")
-                return data
-        except httpx.HTTPStatusError as exc:
-            if exc.response.status_code == 404:
-                logger.warning(f"Complaint {complaint_id} not found")
-                return {"error": "Complaint not found", "status_code": 404}
-            logger.error(f"Attempt {attempt + 1} failed: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                raise
-        except httpx.RequestError as exc:
-            logger.error(f"Attempt {attempt + 1} failed with request error: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                raise
+    try:
+        client = get_http_client()
+        response = await client.get(url, timeout=10.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Successfully retrieved complaint details for {complaint_id}")
+        return data
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 404:
+            logger.warning(f"Complaint {complaint_id} not found")
+            return {"error": "Complaint not found", "status_code": 404}
+        logger.error(f"Attempt {self.request.retries + 1} failed: {exc}")
+        raise
+    except httpx.RequestError as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed with request error: {exc}")
+        raise
 
 
 # ============================================================================
 # ORDER TASKS
 # ============================================================================
 
-@celery_app.task(bind=True, name="tasks.get_order_status")
+@celery_app.task(bind=True, name="tasks.get_order_status", result_ttl=settings.CELERY_LOOKUP_RESULT_TTL, **RETRY_POLICY)
 def get_order_status(self, order_id: str):
     """Get order status and delivery information"""
-    return asyncio.run(_get_order_status(self, order_id))
+    return run_async(_get_order_status(self, order_id))
 
 async def _get_order_status(self, order_id: str):
-    import httpx
+    if DIRECT_DB:
+        return await direct.get_order_status(order_id)
 
     url = f"{settings.API_BASE_URL}/orders/{order_id}"
-    max_retries = settings.CELERY_TASK_MAX_RETRIES
-    retry_delay = settings.CELERY_TASK_RETRY_DELAY
-
-    for attempt in range(max_retries):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Successfully retrieved order status for {order_id}: {data.get('status')}")
-                return data
-        except httpx.HTTPStatusError as exc:
-            if exc.response.status_code == 404:
-                logger.warning(f"Order {order_id} not found")
-                return {"error": "Order not found", "status_code": 404}
-            logger.error(f"Attempt {attempt + 1} failed: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                raise
-        except httpx.RequestError as exc:
-            logger.error(f"Attempt {attempt + 1} failed with request error: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                raise
+    try:
+        client = get_http_client()
+        response = await client.get(url, timeout=10.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Successfully retrieved order status for {order_id}: {data.get('status')}")
+        return data
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 404:
+            logger.warning(f"Order {order_id} not found")
+            return {"error": "Order not found", "status_code": 404}
+        logger.error(f"Attempt {self.request.retries + 1} failed: {exc}")
+        raise
+    except httpx.RequestError as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed with request error: {exc}")
+        raise
 
 
 # ============================================================================
 # ESCALATION TASKS
 # ============================================================================
 
-@celery_app.task(bind=True, name="tasks.escalate_complaint")
+@celery_app.task(bind=True, name="tasks.escalate_complaint", **RETRY_POLICY)
 def escalate_complaint(self, complaint_id: str):
     """Escalate a complaint to higher support level"""
-    return asyncio.run(_escalate_complaint(self, complaint_id))
+    return run_async(_escalate_complaint(self, complaint_id))
 
 async def _escalate_complaint(self, complaint_id: str):
-    import httpx
+    if DIRECT_DB:
+        # The task ID doubles as the escalation ID, so a retry after a commit
+        # whose acknowledgement was lost adds no second escalation
+        return await direct.escalate_complaint(complaint_id, self.request.id)
 
     url = f"{settings.API_BASE_URL}/escalations"
     payload = {"complaint_id": complaint_id}
-    max_retries = settings.CELERY_TASK_MAX_RETRIES
-    retry_delay = settings.CELERY_TASK_RETRY_DELAY
-
-    for attempt in range(max_retries):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Successfully escalated complaint {complaint_id}: escalation_id={data.get('escalation_id')}")
-                return data
-        except httpx.HTTPStatusError as exc:
-            if exc.response.status_code == 404:
-                logger.warning(f"Complaint {complaint_id} not found for escalation")
-                return {"error": "Complaint not found", "status_code": 404}
-            logger.error(f"Attempt {attempt + 1} failed to escalate: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                raise
-        except httpx.RequestError as exc:
-            logger.error(f"Attempt {attempt + 1} failed with request error: {exc}")
-            if attempt < max_retries - 1:
-                sleep(retry_delay)
-            else:
-                raise
+    # Retries reuse the task ID as Idempotency-Key, so they never add a second escalation
+    headers = {"Idempotency-Key": self.request.id} if self.request.id else {}
+    try:
+        client = get_http_client()
+        response = await client.post(url, json=payload, headers=headers, timeout=10.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Successfully escalated complaint {complaint_id}: escalation_id={data.get('escalation_id')}")
+        return data
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 404:
+            logger.warning(f"Complaint {complaint_id} not found for escalation")
+            return {"error": "Complaint not found", "status_code": 404}
+        logger.error(f"Attempt {self.request.retries + 1} failed to escalate: {exc}")
+        raise
+    except httpx.RequestError as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed with request error: {exc}")
+        raise
 
 
 # ============================================================================
 # BACKGROUND PROCESSING TASKS
 # ============================================================================
 
-@celery_app.task(bind=True, name="tasks.process_complaint_workflow")
+@celery_app.task(bind=True, name="tasks.process_complaint_workflow", **RETRY_POLICY)
 def process_complaint_workflow(self, order_id: str, issue: str, complaint_id: str = None):
     """
     Complete workflow: Check order -> Create complaint -> Auto-escalate if critical
     """
-    return asyncio.run(_process_complaint_workflow(self, order_id, issue, complaint_id))
+    return run_async(_process_complaint_workflow(self, order_id, issue, complaint_id))
 
 async def _process_complaint_workflow(self, order_id: str, issue: str, complaint_id: str = None):
-    import httpx
     from uuid import uuid4
 
     if not complaint_id:
-        complaint_id = str(uuid4())
-
-    workflow_result = {
-        "order_id": order_id,
-        "complaint_id": complaint_id,
-        "steps": []
-    }
-
-    # Step 1: Check order exists
-    logger.info(f"Step 1: Checking order {order_id}")
-    try:
-        order_result = await _get_order_status(self, order_id)
-        if "error" in order_result:
-            workflow_result["steps"].append({"step": "check_order", "status": "failed", "error": order_result["error"]})
-            return workflow_result
-        workflow_result["steps"].append({"step": "check_order", "status": "success", "order": order_result})
-    except Exception as e:
-        workflow_result["steps"].append({"step": "check_order", "status": "failed", "error": str(e)})
-        return workflow_result
+        # Derived from the task ID so a retried workflow files the same complaint
+        complaint_id = self.request.id or str(uuid4())
 
-    # Step 2: Create complaint
-    logger.info(f"Step 2: Creating complaint {complaint_id}")
+    # The whole workflow is one API call (or one DB transaction in direct mode),
+    # so a failed step never leaves a complaint behind without its escalation
     try:
-        complaint_result = await _create_complaint(self, complaint_id, order_id, issue)
-        if "error" in complaint_result:
-            workflow_result["steps"].append({"step": "create_complaint", "status": "failed", "error": complaint_result["error"]})
-            return workflow_result
-        workflow_result["steps"].append({"step": "create_complaint", "status": "success", "complaint": complaint_result})
+        if DIRECT_DB:
+            workflow_result = await direct.run_complaint_workflow(order_id, issue, complaint_id)
+        else:
+            url = f"{settings.API_BASE_URL}/workflows/complaint"
+            payload = {"order_id": order_id, "issue": issue, "complaint_id": complaint_id}
+            headers = {"Idempotency-Key": self.request.id} if self.request.id else {}
+            client = get_http_client()
+            response = await client.post(url, json=payload, headers=headers, timeout=10.0)
+            raise_for_status(response)
+            workflow_result = response.json()
     except Exception as e:
-        workflow_result["steps"].append({"step": "create_complaint", "status": "failed", "error": str(e)})
-        return workflow_result
-
-    # Step 3: Auto-escalate if issue contains critical keywords
-    critical_keywords = ["damaged", "lost", "wrong item", "missing", "urgent", "critical"]
-    should_escalate = any(keyword in issue.lower() for keyword in critical_keywords)
-
-    if should_escalate:
-        logger.info(f"Step 3: Auto-escalating complaint {complaint_id} due to critical issue")
-        try:
-            escalation_result = await _escalate_complaint(self, complaint_id)
-            workflow_result["steps"].append({"step": "auto_escalate", "status": "success", "escalation": escalation_result})
-        except Exception as e:
-            workflow_result["steps"].append({"step": "auto_escalate", "status": "failed", "error": str(e)})
-    else:
-        workflow_result["steps"].append({"step": "auto_escalate", "status": "skipped", "reason": "Not a critical issue"})
-
-    workflow_result["completed"] = True
-    logger.info(f"Workflow completed for complaint {complaint_id}")
+        logger.error(f"Attempt {self.request.retries + 1} failed for complaint workflow {complaint_id}: {e}")
+        _raise_if_retrying(self, e)
+        return {
+            "order_id": order_id,
+            "complaint_id": complaint_id,
+            "steps": [{"step": "workflow", "status": "failed", "error": str(e)}]
+        }
+
+    logger.info(f"Workflow for complaint {complaint_id} finished: {[step['status'] for step in workflow_result['steps']]}")
     return workflow_result
 
 
-@celery_app.task(bind=True, name="tasks.send_notification")
-def send_notification(self, recipient: str, message_type: str, data: dict):
+# Fire-and-forget: nothing reads the result, so none is stored
+@celery_app.task(bind=True, name="tasks.send_notification", ignore_result=True)
+def send_notification(self, recipient: str, message_type: str, data: dict, channel: str = "email"):
     """
-    Send notification (email/SMS) - mock implementation
-    In production, integrate with email service (SendGrid, AWS SES) or SMS (Twilio)
+    Send notification (email/SMS)
+    Buffered in the worker and sent as a per-recipient digest when
+    NOTIFICATION_DIGEST_WINDOW_SECONDS closes, in batches (see notifications.py)
     """
-    logger.info(f"Sending {message_type} notification to {recipient}")
-    logger.info(f"Notification data: {data}")
-    
-    # Mock notification sending
-    notification_result = {
-        "recipient": recipient,
-        "message_type": message_type,
-        "data": data,
-        "sent_at": datetime.utcnow().isoformat(),
-        "status": "sent",
-        "message": f"{message_type} notification sent successfully"
-    }
-    
-    sleep(2)  # Simulate network delay
-    logger.info(f"Notification sent to {recipient}")
-    return notification_result
+    logger.info(f"Queued {message_type} {channel} notification to {recipient}")
+    run_async(notifications.enqueue(recipient, channel, message_type, data))
 
 
-@celery_app.task(bind=True, name="tasks.generate_daily_report")
-def generate_daily_report(self):
+# Acknowledged only once the transport accepted it, and retried until then
+@celery_app.task(bind=True, name="tasks.deliver_notification", ignore_result=True, acks_late=True, **RETRY_POLICY)
+def deliver_notification(self, recipient: str, message_type: str, data: dict, channel: str = "email"):
     """
-    Generate daily summary report of complaints and escalations
-    This would typically run on a schedule (Celery Beat)
+    Send a notification that must not be lost (e.g. alerts) straight through the
+    transport, skipping send_notification's in-memory digest buffer
+    """
+    run_async(notifications.deliver(recipient, channel, message_type, data))
+    logger.info(f"Delivered {message_type} {channel} notification to {recipient}")
+
+
+@celery_app.task(bind=True, name="tasks.generate_daily_report", result_ttl=settings.CELERY_LOOKUP_RESULT_TTL, **RETRY_POLICY)
+def generate_daily_report(self, day: str = None):
     """
+    Generate daily summary report of complaints and escalations (today by default)
+    Read-only; Beat runs publish_daily_report for finished days
+    """
+    return run_async(_generate_daily_report(self, day))
+
+async def _generate_daily_report(self, day: str = None):
+    if DIRECT_DB:
+        return await direct.generate_daily_report(day)
+
+    url = f"{settings.API_BASE_URL}/reports/daily"
+    params = {"day": day} if day else {}
     logger.info("Generating daily report...")
-    
-    # Mock report generation
-    report = {
-        "date": datetime.utcnow().date().isoformat(),
-        "generated_at": datetime.utcnow().isoformat(),
-        "summary": {
-            "total_complaints": 0,
-            "escalated_complaints": 0,
-            "resolved_complaints": 0,
-            "pending_complaints": 0
-        },
-        "status": "generated"
-    }
-    
-    sleep(3)  # Simulate report generation
-    logger.info("Daily report generated successfully")
+    try:
+        client = get_http_client()
+        response = await client.get(url, params=params, timeout=10.0)
+        raise_for_status(response)
+        report = response.json()
+        logger.info(f"Daily report for {report.get('date')} generated successfully")
+        return report
+    except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed to generate daily report: {exc}")
+        raise
+
+
+@celery_app.task(bind=True, name="tasks.regenerate_daily_reports", **RETRY_POLICY)
+def regenerate_daily_reports(self, start: str, end: str):
+    """Rebuild the daily counters from the complaint/escalation tables for a date range"""
+    return run_async(_regenerate_daily_reports(self, start, end))
+
+async def _regenerate_daily_reports(self, start: str, end: str):
+    if DIRECT_DB:
+        return await direct.regenerate_daily_reports(start, end)
+
+    url = f"{settings.API_BASE_URL}/reports/daily/rebuild"
+    payload = {"start": start, "end": end}
+    try:
+        client = get_http_client()
+        # Rebuilding a long range aggregates a lot of rows; allow more time
+        response = await client.post(url, json=payload, timeout=60.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Regenerated {len(data['reports'])} daily reports from {start} to {end}")
+        return data
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 400:
+            logger.warning(f"Invalid report range {start}..{end}: {exc.response.text}")
+            return {"error": "Invalid date range", "status_code": 400}
+        logger.error(f"Attempt {self.request.retries + 1} failed to regenerate reports: {exc}")
+        raise
+    except httpx.RequestError as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed with request error: {exc}")
+        raise
+
+
+@celery_app.task(bind=True, name="tasks.publish_daily_report", **RETRY_POLICY)
+def publish_daily_report(self, day: str = None):
+    """
+    Store the final counters for a finished day (yesterday, UTC, by default) and
+    send its report to DAILY_REPORT_RECIPIENT (run by Beat just after midnight)
+    """
+    return run_async(_publish_daily_report(self, day))
+
+async def _publish_daily_report(self, day: str = None):
+    day = day or (datetime.utcnow().date() - timedelta(days=1)).isoformat()
+
+    # Recounting from the complaint/escalation tables persists the day's counters,
+    # including writes whose deltas were not rolled up yet
+    rebuilt = await _regenerate_daily_reports(self, day, day)
+    if "error" in rebuilt:
+        return rebuilt
+    [report] = rebuilt["reports"]
+
+    await asyncio.to_thread(
+        send_notification.delay,
+        settings.DAILY_REPORT_RECIPIENT,
+        "daily_report",
+        report,
+        channel=settings.DAILY_REPORT_CHANNEL
+    )
+    logger.info(f"Published daily report for {day} to {settings.DAILY_REPORT_RECIPIENT}")
     return report
 
 
+@celery_app.task(bind=True, name="tasks.roll_up_daily_stats", ignore_result=True, **RETRY_POLICY)
+def roll_up_daily_stats(self):
+    """Fold the counter deltas appended by writes into the per-day counters (run by Beat)"""
+    return run_async(_roll_up_daily_stats(self))
+
+async def _roll_up_batch(self, limit: int) -> dict:
+    if DIRECT_DB:
+        return await direct.roll_up_daily_stats(limit)
+
+    url = f"{settings.API_BASE_URL}/reports/daily/rollup"
+    try:
+        client = get_http_client()
+        response = await client.post(url, json={"limit": limit}, timeout=30.0)
+        raise_for_status(response)
+        return response.json()
+    except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed to roll up daily stats: {exc}")
+        raise
+
+async def _roll_up_daily_stats(self):
+    # Each batch commits on its own
+    rolled_up = 0
+    for _ in range(settings.DAILY_STATS_ROLLUP_MAX_BATCHES):
+        batch = await _roll_up_batch(self, settings.DAILY_STATS_ROLLUP_BATCH_SIZE)
+        rolled_up += batch["rolled_up"]
+        if not batch["has_more"]:
+            break
+
+    logger.info(f"Rolled up {rolled_up} daily stats deltas")
+    return {"rolled_up": rolled_up}
+
+
+@celery_app.task(bind=True, name="tasks.sweep_stale_escalations", **RETRY_POLICY)
+def sweep_stale_escalations(self):
+    """Alert on escalations still Pending after ESCALATION_STALE_AFTER_MINUTES (run by Beat)"""
+    return run_async(_sweep_stale_escalations(self))
+
+async def _sweep_batch(self, older_than_minutes: int, limit: int) -> dict:
+    if DIRECT_DB:
+        return await direct.sweep_stale_escalations(older_than_minutes, limit)
+
+    url = f"{settings.API_BASE_URL}/escalations/sweep"
+    payload = {"older_than_minutes": older_than_minutes, "limit": limit}
+    try:
+        client = get_http_client()
+        response = await client.post(url, json=payload, timeout=30.0)
+        raise_for_status(response)
+        return response.json()
+    except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed to sweep escalations: {exc}")
+        raise
+
+async def _advance_sweep(self, last: dict) -> dict:
+    if DIRECT_DB:
+        return await direct.advance_sweep(last["created_at"], last["id"])
+
+    url = f"{settings.API_BASE_URL}/escalations/sweep/advance"
+    payload = {"last_created_at": last["created_at"], "last_id": last["id"]}
+    try:
+        client = get_http_client()
+        response = await client.post(url, json=payload, timeout=30.0)
+        raise_for_status(response)
+        return response.json()
+    except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed to advance the escalation sweep: {exc}")
+        raise
+
+async def _sweep_stale_escalations(self):
+    older_than_minutes = settings.ESCALATION_STALE_AFTER_MINUTES
+
+    # The high-water mark only moves past a batch once its alert is a durable
+    # deliver_notification message in the broker, so a failure before that
+    # returns the batch again (an alert may repeat, but is never lost), and the
+    # next run resumes after the last alerted escalation instead of rescanning
+    swept = 0
+    has_more = False
+    for _ in range(settings.ESCALATION_SWEEP_MAX_BATCHES):
+        batch = await _sweep_batch(self, older_than_minutes, settings.ESCALATION_SWEEP_BATCH_SIZE)
+        if batch["escalations"]:
+            await asyncio.to_thread(
+                deliver_notification.delay,
+                settings.ESCALATION_ALERT_RECIPIENT,
+                "stale_escalations",
+                {"older_than_minutes": older_than_minutes, "escalations": batch["escalations"]}
+            )
+            await _advance_sweep(self, batch["escalations"][-1])
+            swept += len(batch["escalations"])
+        has_more = batch["has_more"]
+        if not has_more:
+            break
+
+    logger.info(f"Swept {swept} stale escalations (more pending: {has_more})")
+    return {"swept": swept, "has_more": has_more}
+
+
 # ============================================================================
 # BATCH PROCESSING TASKS
 # ============================================================================
 
-@celery_app.task(bind=True, name="tasks.batch_check_orders")
+@celery_app.task(bind=True, name="tasks.batch_check_orders", result_ttl=settings.CELERY_LOOKUP_RESULT_TTL, **RETRY_POLICY)
 def batch_check_orders(self, order_ids: list):
     """Check status of multiple orders in batch"""
-    return asyncio.run(_batch_check_orders(self, order_ids))
+    subtask_size = settings.CELERY_BATCH_SUBTASK_SIZE
+    if len(order_ids) > subtask_size:
+        # Fan very large inputs out as a chord of sub-batches run across workers;
+        # the merged result replaces this task's result, in input order
+        parts = [order_ids[start:start + subtask_size] for start in range(0, len(order_ids), subtask_size)]
+        logger.info(f"Splitting batch of {len(order_ids)} orders into {len(parts)} sub-tasks")
+        return self.replace(chord((batch_check_orders.s(part) for part in parts), merge_batch_results.s()))
+    return run_async(_batch_check_orders(self, order_ids))
+
+
+@celery_app.task(bind=True, name="tasks.merge_batch_results", result_ttl=settings.CELERY_LOOKUP_RESULT_TTL)
+def merge_batch_results(self, parts: list):
+    """Chord callback: concatenate sub-batch results (the chord keeps header order)"""
+    results = [result for part in parts for result in part["results"]]
+    return {
+        "total": len(results),
+        "results": results
+    }
+
+async def _lookup_orders(self, order_ids: list):
+    if DIRECT_DB:
+        return await direct.lookup_orders(order_ids)
+
+    url = f"{settings.API_BASE_URL}/orders/lookup"
+    payload = {"order_ids": order_ids}
+    try:
+        client = get_http_client()
+        response = await client.post(url, json=payload, timeout=10.0)
+        raise_for_status(response)
+        data = response.json()
+        logger.info(f"Looked up {len(order_ids)} orders: {len(data.get('missing', []))} missing")
+        return data
+    except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+        logger.error(f"Attempt {self.request.retries + 1} failed for order lookup: {exc}")
+        raise
+
+async def _check_order_chunk(self, chunk: list, semaphore: asyncio.Semaphore) -> list:
+    async with semaphore:
+        data = await _lookup_orders(self, chunk)
+
+    found = {order["order_id"]: order for order in data["orders"]}
+    return [
+        {"order_id": order_id, "status": "success", "data": found.get(order_id, {"error": "Order not found", "status_code": 404})}
+        for order_id in chunk
+    ]
 
 async def _batch_check_orders(self, order_ids: list):
-    import httpx
-    
+    chunk_size = settings.CELERY_BATCH_LOOKUP_CHUNK_SIZE
+    chunks = [order_ids[start:start + chunk_size] for start in range(0, len(order_ids), chunk_size)]
+
+    # Chunks are looked up concurrently over the shared HTTP client, at most
+    # CELERY_BATCH_CONCURRENCY requests in flight; gather keeps input order
+    semaphore = asyncio.Semaphore(settings.CELERY_BATCH_CONCURRENCY)
+    outcomes = await asyncio.gather(
+        *(_check_order_chunk(self, chunk, semaphore) for chunk in chunks),
+        return_exceptions=True
+    )
+
     results = []
-    async with httpx.AsyncClient() as client:
-        for order_id in order_ids:
-            try:
-                result = await _get_order_status(self, order_id)
-                results.append({"order_id": order_id, "status": "success", "data": result})
-            except Exception as e:
-                results.append({"order_id": order_id, "status": "failed", "error": str(e)})
-    
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, Exception):
+            _raise_if_retrying(self, outcome)
+            results.extend({"order_id": order_id, "status": "failed", "error": str(outcome)} for order_id in chunk)
+        else:
+            results.extend(outcome)
+
     logger.info(f"Batch processed {len(order_ids)} orders")
     return {
         "total": len(order_ids),
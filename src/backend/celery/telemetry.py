@@ -0,0 +1,145 @@
+"""
+Per-task telemetry from Celery signals: how long a task waited in the broker,
+how long it ran, and how often it was retried or failed, labelled by task name.
+
+The publisher stamps each message with its publish time (before_task_publish);
+the worker measures queue wait against that stamp when the task starts. Workers
+serve the metrics on CELERY_METRICS_PORT for Prometheus to scrape.
+
+Queue wait compares the publisher's and the worker's clocks, so it is only as
+accurate as their clock sync; retries and other delayed messages are measured
+from their ETA, not from when they were published.
+"""
+import logging
+from datetime import datetime
+from threading import Lock
+from time import perf_counter, time
+from typing import Optional
+
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_init,
+)
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("celery.task")
+
+PUBLISHED_AT_HEADER = "published_at"
+
+TASKS_PUBLISHED = Counter(
+    "celery_tasks_published_total",
+    "Task messages published by this process",
+    ["task"]
+)
+QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time from publish (or ETA) until a worker started the task",
+    ["task"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+RUNTIME = Histogram(
+    "celery_task_runtime_seconds",
+    "Task execution time by final state",
+    ["task", "state"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0)
+)
+IN_PROGRESS = Gauge(
+    "celery_tasks_in_progress",
+    "Tasks currently executing in this worker; compare with CELERY_WORKER_CONCURRENCY",
+    ["task"]
+)
+RETRIES = Counter(
+    "celery_task_retries_total",
+    "Task retries scheduled",
+    ["task"]
+)
+FAILURES = Counter(
+    "celery_task_failures_total",
+    "Tasks that failed after their last attempt, by exception type",
+    ["task", "exception"]
+)
+
+# Start times by task ID; pool threads run tasks concurrently
+_started = {}
+_started_lock = Lock()
+
+
+def _task_name(task, fallback: Optional[str] = None) -> str:
+    return getattr(task, "name", None) or fallback or "unknown"
+
+
+def _eta_timestamp(eta) -> Optional[float]:
+    if not eta:
+        return None
+    if isinstance(eta, str):
+        eta = datetime.fromisoformat(eta)
+    return eta.timestamp()
+
+
+@before_task_publish.connect
+def stamp_publish_time(sender=None, headers=None, **kwargs):
+    # Protocol 2 messages carry custom headers through to task.request
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time()
+    TASKS_PUBLISHED.labels(task=sender or "unknown").inc()
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    name = _task_name(task)
+    with _started_lock:
+        _started[task_id] = perf_counter()
+    IN_PROGRESS.labels(task=name).inc()
+
+    request = getattr(task, "request", None)
+    published_at = getattr(request, PUBLISHED_AT_HEADER, None)
+    if published_at is None or getattr(request, "is_eager", False):
+        return
+    try:
+        ready_at = max(float(published_at), _eta_timestamp(getattr(request, "eta", None)) or 0.0)
+    except (TypeError, ValueError):
+        return
+    QUEUE_WAIT.labels(task=name).observe(max(time() - ready_at, 0.0))
+
+
+@task_postrun.connect
+def record_task_end(task_id=None, task=None, state=None, **kwargs):
+    name = _task_name(task)
+    with _started_lock:
+        started = _started.pop(task_id, None)
+    IN_PROGRESS.labels(task=name).dec()
+    if started is not None:
+        RUNTIME.labels(task=name, state=state or "UNKNOWN").observe(perf_counter() - started)
+
+
+@task_retry.connect
+def record_task_retry(sender=None, **kwargs):
+    RETRIES.labels(task=_task_name(sender)).inc()
+
+
+@task_failure.connect
+def record_task_failure(sender=None, exception=None, **kwargs):
+    FAILURES.labels(task=_task_name(sender), exception=type(exception).__name__).inc()
+
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    # Served by the worker's main process. Under --pool=prefork the tasks run in
+    # child processes, whose metrics this endpoint does not see.
+    if not settings.CELERY_METRICS_PORT:
+        return
+    if settings.CELERY_WORKER_POOL == "prefork":
+        logger.warning("Task metrics are collected per process; with --pool=prefork use threads or solo to scrape them")
+    try:
+        start_http_server(settings.CELERY_METRICS_PORT)
+    except OSError as exc:
+        logger.warning(f"Could not serve task metrics on port {settings.CELERY_METRICS_PORT}: {exc}")
+        return
+    logger.info(f"Serving task metrics on port {settings.CELERY_METRICS_PORT}")
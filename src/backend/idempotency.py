@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+def request_fingerprint(payload: Any) -> str:
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Stores the outcome of write requests under their Idempotency-Key, so a retry
+    replays the original response instead of repeating the write.
+    """
+
+    def __init__(self, backend, ttl: int, lock_ttl: int, prefix: str = "idempotency:"):
+        self._backend = backend
+        self._ttl = ttl
+        self._lock_ttl = lock_ttl
+        self._prefix = prefix
+
+    async def run(self, scope: str, key: Optional[str], payload: Any,
+                  handler: Callable[[], Awaitable[Any]]) -> Any:
+        """Call handler once per (scope, key); later calls with the key get the stored response"""
+        if not key:
+            return await handler()
+
+        storage_key = f"{self._prefix}{scope}:{key}"
+        fingerprint = request_fingerprint(payload)
+
+        try:
+            stored = await self._reserve(storage_key, fingerprint)
+        except Exception as exc:
+            # Without the key store, behave like a request without a key
+            logger.warning(f"Idempotency store unavailable, running {scope} without it: {exc}")
+            return await handler()
+
+        if stored is not None:
+            return self._replay(stored, fingerprint)
+
+        try:
+            response = await handler()
+        except HTTPException as exc:
+            # Client errors are as deterministic as successes; server errors may succeed on retry
+            if exc.status_code < 500:
+                await self._save(storage_key, fingerprint, exc.status_code, {"detail": exc.detail})
+            else:
+                await self._release(storage_key)
+            raise
+        except BaseException:
+            await self._release(storage_key)
+            raise
+
+        await self._save(storage_key, fingerprint, 200, jsonable_encoder(response))
+        return response
+
+    async def _reserve(self, storage_key: str, fingerprint: str) -> Optional[dict]:
+        """None if this caller now owns the key, otherwise the stored record"""
+        placeholder = {"state": IN_PROGRESS, "fingerprint": fingerprint}
+        if await self._backend.add(storage_key, placeholder, self._lock_ttl):
+            return None
+        return await self._backend.get(storage_key) or placeholder
+
+    def _replay(self, stored: dict, fingerprint: str) -> JSONResponse:
+        if stored["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        if stored["state"] == IN_PROGRESS:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        return JSONResponse(
+            content=stored["body"],
+            status_code=stored["status_code"],
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    async def _save(self, storage_key: str, fingerprint: str, status_code: int, body: Any):
+        record = {"state": COMPLETED, "fingerprint": fingerprint, "status_code": status_code, "body": body}
+        try:
+            await self._backend.set(storage_key, record, self._ttl)
+        except Exception as exc:
+            logger.warning(f"Could not store idempotent response for {storage_key}: {exc}")
+
+    async def _release(self, storage_key: str):
+        try:
+            await self._backend.delete(storage_key)
+        except Exception as exc:
+            logger.warning(f"Could not release idempotency key {storage_key}: {exc}")
@@ -0,0 +1,99 @@
+"""
+One-shot database initialization: create the schema, upgrade tables created by
+earlier versions, and seed sample orders.
+
+Run once per deployment (and after upgrading) before starting API workers:
+    python src/backend/init_db.py
+Every step is idempotent and safe to run from several processes at once.
+"""
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+# Add parent directory to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import inspect, text
+
+from memory.base import Base, async_engine, async_write_engine, dialect_insert
+from memory.complaints import Complaint
+from memory.order import Order
+from memory.escalation import Escalation
+from memory.daily_stats import DailyStats, DailyStatsDelta
+from memory.sweep_state import SweepState
+
+SAMPLE_ORDERS = [
+    {"order_id": "ORD123", "status": "Shipped", "estimated_delivery": "2025-07-20"},
+    {"order_id": "ORD456", "status": "Processing", "estimated_delivery": "2025-07-25"},
+    {"order_id": "ORD141", "status": "Delivered", "estimated_delivery": "2025-07-15"}
+]
+
+# Arbitrary key for the Postgres advisory lock serializing schema creation
+SCHEMA_LOCK_KEY = 0x5C4E4D41
+
+# Columns added to tables that earlier versions created. create_all never alters
+# an existing table, so upgrade_schema adds them and backfills existing rows.
+ADDED_COLUMNS = [
+    ("complaints", "created_at"),
+    ("escalations", "created_at"),
+]
+
+# Indexes superseded by composite ones, or left without a reader
+DROPPED_INDEXES = ["ix_complaints_order_id", "ix_escalations_status_id", "ix_escalations_created_at"]
+
+def upgrade_schema(conn):
+    """Add missing columns, drop superseded indexes and build missing ones on
+    existing tables (create_all only handles missing tables)"""
+    inspector = inspect(conn)
+    backfill_at = datetime.utcnow()
+
+    for table_name, column_name in ADDED_COLUMNS:
+        if column_name in {column["name"] for column in inspector.get_columns(table_name)}:
+            continue
+        column = Base.metadata.tables[table_name].c[column_name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+        conn.execute(text(f"UPDATE {table_name} SET {column_name} = :value"), {"value": backfill_at})
+        # SQLite cannot make an existing column NOT NULL; the ORM default fills it on insert
+        if not column.nullable and conn.dialect.name == "postgresql":
+            conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} SET NOT NULL"))
+
+    for index_name in DROPPED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+async def create_schema():
+    """Create missing tables and bring existing ones up to date"""
+    async with async_engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # create_all checks then creates; without the lock two initializers
+            # can both see a table missing and one fails on CREATE
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+
+async def seed_sample_orders():
+    """Insert the sample orders in one statement, skipping any that already exist"""
+    stmt = dialect_insert(Order).values(SAMPLE_ORDERS).on_conflict_do_nothing(index_elements=[Order.order_id])
+    async with async_write_engine.begin() as conn:
+        await conn.execute(stmt)
+
+async def init_db(seed: bool = True):
+    await create_schema()
+    if seed:
+        await seed_sample_orders()
+
+async def main():
+    started = perf_counter()
+    await init_db()
+    await async_engine.dispose()
+    await async_write_engine.dispose()
+    print(f"Database initialized in {(perf_counter() - started) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
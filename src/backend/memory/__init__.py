@@ -1,6 +1,8 @@
-from .base import Base, async_engine, sync_engine, get_db_connection
+from .base import Base, async_engine, async_write_engine, sync_engine, get_db_connection, dialect_insert, pool_metrics, pool_status
 from .complaints import Complaint
 from .order import Order
 from .escalation import Escalation
+from .daily_stats import DailyStats, DailyStatsDelta
+from .sweep_state import SweepState
 
-__all__ = ["Base", "async_engine", "sync_engine", "get_db_connection", "Complaint", "Order", "Escalation"]
+__all__ = ["Base", "async_engine", "async_write_engine", "sync_engine", "get_db_connection", "dialect_insert", "pool_metrics", "pool_status", "Complaint", "Order", "Escalation", "DailyStats", "DailyStatsDelta", "SweepState"]
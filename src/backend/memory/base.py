@@ -1,7 +1,10 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
+from threading import Lock
 import sys
 from pathlib import Path
 
@@ -17,15 +20,177 @@ settings = get_settings()
 
 DATABASE_URL = settings.DATABASE_URL
 
-ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql+psycopg://", "postgresql+asyncpg://")
+# Sync drivers in DATABASE_URL map to their async counterparts
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _pool_options(url) -> dict:
+    """Pool sizing from settings; in-memory SQLite uses a static pool that takes none"""
+    url = make_url(url)
+    if url.database in (None, "", ":memory:"):
+        return {}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_backend_name() == "sqlite" and settings.SQLITE_CONCURRENCY_MODE:
+        # Every aiosqlite connection is a thread competing for the GIL, so a large
+        # read pool stretches the writer's round trips and starves writes; overflow
+        # connections would also be reopened (pragmas included) on every burst
+        options.update(pool_size=settings.SQLITE_READ_POOL_SIZE, max_overflow=0)
+    return options
+
+def _async_url(url: str):
+    async_url = make_url(url)
+    async_url = async_url.set(drivername=ASYNC_DRIVERS.get(async_url.drivername, async_url.drivername))
+    if async_url.drivername == "postgresql+asyncpg":
+        async_url = async_url.update_query_dict({
+            "prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)
+        })
+    return async_url
+
+ASYNC_DATABASE_URL = _async_url(DATABASE_URL)
 
 # Create async engine
-async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    **_pool_options(ASYNC_DATABASE_URL)
+)
 
 # Create sync engine for metadata operations
-sync_engine = create_engine(DATABASE_URL)
+sync_engine = create_engine(DATABASE_URL, **_pool_options(DATABASE_URL))
+
+def _sqlite_pragmas() -> list:
+    pragmas = [
+        "PRAGMA foreign_keys=ON",  # SQLite only enforces foreign keys when asked to
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+    if settings.SQLITE_CONCURRENCY_MODE:
+        pragmas += [
+            "PRAGMA journal_mode=WAL",  # Readers no longer block on the writer
+            "PRAGMA synchronous=NORMAL",  # fsync at checkpoints rather than every commit
+            f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+            f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        ]
+    return pragmas
+
+def _configure_sqlite(engine):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+def _begin_immediate(engine):
+    """Take SQLite's write lock at BEGIN, so busy_timeout applies to waiting writers
+    instead of a read transaction failing when it later tries to upgrade"""
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+# Writes go through async_write_engine. On Postgres it is the same engine; on a
+# SQLite file it holds a single connection, so writers queue in the pool while
+# reads stay concurrent on async_engine.
+async_write_engine = async_engine
+
+if async_engine.dialect.name == "sqlite":
+    _configure_sqlite(async_engine)
+
+    if settings.SQLITE_CONCURRENCY_MODE and _pool_options(ASYNC_DATABASE_URL):
+        async_write_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            echo=False,
+            **{**_pool_options(ASYNC_DATABASE_URL), "pool_size": 1, "max_overflow": 0}
+        )
+        _configure_sqlite(async_write_engine)
+        _begin_immediate(async_write_engine)
+
+class PoolMetrics:
+    """Counters for the async engine's pool, used to size it against real load"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": round(self.wait_total / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+                "checkout_wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+pool_metrics = PoolMetrics()
+
+def _track_pool(engine):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _count_connect(dbapi_connection, connection_record):
+        pool_metrics.record_connect()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_metrics.record_checkout()
+
+_track_pool(async_engine)
+if async_write_engine is not async_engine:
+    _track_pool(async_write_engine)
+
+def _pool_occupancy(pool) -> dict:
+    status = {"pool_class": type(pool).__name__}
+    # Only queue-based pools expose sizing; static/singleton pools report what they have
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    return status
+
+def pool_status() -> dict:
+    """Current pool occupancy plus cumulative checkout metrics"""
+    status = _pool_occupancy(async_engine.pool)
+    if async_write_engine is not async_engine:
+        status["writer"] = _pool_occupancy(async_write_engine.pool)
+    status.update(pool_metrics.snapshot())
+    return status
 
 Base = declarative_base()
 
+def dialect_insert(model):
+    """INSERT construct for the active backend, with ON CONFLICT support"""
+    if async_engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
 def get_db_connection():
-    return sync_engine.connect()
\ No newline at end of file
+    return sync_engine.connect()
@@ -1,14 +1,21 @@
 from .base import Base
-from sqlalchemy import Column, String, Text, ForeignKey
+from sqlalchemy import Column, String, Text, ForeignKey, Index, DateTime
 from sqlalchemy.orm import relationship
+from datetime import datetime
 
 class Complaint(Base):
     __tablename__ = "complaints"
+    __table_args__ = (
+        # Keyset pagination: filter column first, then the id cursor
+        Index("ix_complaints_escalation_status_id", "escalation_status", "id"),
+        Index("ix_complaints_order_id_id", "order_id", "id"),
+    )
 
     id = Column(String, primary_key=True, index=True, unique=True)
-    order_id = Column(String, ForeignKey("orders.order_id"), index=True)
+    order_id = Column(String, ForeignKey("orders.order_id"))
     issue = Column(Text)
     escalation_status = Column(String, default="Not Escalated")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
 
     # Relationship to Order
     order = relationship("Order", back_populates="complaints")
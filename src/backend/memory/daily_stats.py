@@ -0,0 +1,22 @@
+from .base import Base
+from sqlalchemy import Column, Date, Integer
+
+class DailyStats(Base):
+    """Per-day counters, rolled up from DailyStatsDelta rows"""
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True)
+    complaints_created = Column(Integer, nullable=False, default=0)
+    escalations_created = Column(Integer, nullable=False, default=0)
+    escalations_resolved = Column(Integer, nullable=False, default=0)
+
+class DailyStatsDelta(Base):
+    """Counter increments appended in the same transaction as the writes they count.
+    Appending takes no shared row lock, so concurrent writers never wait on each other
+    here; a periodic roll-up folds the rows into DailyStats."""
+    __tablename__ = "daily_stats_deltas"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    complaints_created = Column(Integer, nullable=False, default=0)
+    escalations_created = Column(Integer, nullable=False, default=0)
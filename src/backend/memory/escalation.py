@@ -1,13 +1,21 @@
 from .base import Base
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index, DateTime
 from sqlalchemy.orm import relationship
+from datetime import datetime
 
 class Escalation(Base):
     __tablename__ = "escalations"
+    __table_args__ = (
+        # Unfiltered listing: (created_at, id) keyset
+        Index("ix_escalations_created_at_id", "created_at", "id"),
+        # Stale-escalation sweep and status-filtered listing: status, then the (created_at, id) key
+        Index("ix_escalations_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, index=True, unique=True)
     complaint_id = Column(String, ForeignKey("complaints.id"), nullable=False, index=True)
     status = Column(String, default="Pending")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     # Relationship to Complaint
     complaint = relationship("Complaint", back_populates="escalations")
@@ -0,0 +1,504 @@
+"""
+Data access shared by the API handlers and the Celery tasks (in direct mode).
+
+Functions take the caller's AsyncSession and never commit, so the caller picks the
+transaction boundary: a single write, a group commit or a multi-step workflow.
+Results are plain dicts in the same shape the API returns.
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import case, delete, exists, func, insert, literal, or_, select, text, tuple_, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .base import async_engine, dialect_insert
+from .complaints import Complaint
+from .daily_stats import DailyStats, DailyStatsDelta
+from .escalation import Escalation
+from .order import Order
+from .sweep_state import SweepState
+
+
+class RepositoryError(Exception):
+    """Domain error, carrying the HTTP status the API reports it with"""
+    status_code = 400
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class NotFoundError(RepositoryError):
+    status_code = 404
+
+
+class AlreadyExistsError(RepositoryError):
+    status_code = 400
+
+
+def complaint_to_dict(complaint: Complaint) -> dict:
+    return {
+        "id": complaint.id,
+        "order_id": complaint.order_id,
+        "issue": complaint.issue,
+        "escalation_status": complaint.escalation_status
+    }
+
+def complaint_check(complaint: Optional[dict]) -> dict:
+    if complaint:
+        return {
+            "exists": True,
+            "complaint_id": complaint["id"],
+            "issue": complaint["issue"],
+            "escalation_status": complaint["escalation_status"]
+        }
+    return {
+        "exists": False
+    }
+
+def complaint_cache_keys(complaint_id: str, order_id: str):
+    """Response-cache entries that hold this complaint; drop them after writing it"""
+    return (f"complaint:{complaint_id}", f"complaint_by_order:{order_id}")
+
+def order_to_dict(order: Order) -> dict:
+    return {
+        "order_id": order.order_id,
+        "status": order.status,
+        "estimated_delivery": order.estimated_delivery
+    }
+
+# Advisory lock class for per-day counters (Postgres); the day's ordinal is the second key
+DAILY_STATS_LOCK_KEY = 0x44535441
+
+async def bump_daily_stats(db: AsyncSession, complaints: int = 0, escalations: int = 0):
+    """Add to today's counters in the caller's transaction. Appends a delta row rather
+    than updating the day's counter row, which every write would otherwise queue on;
+    roll_up_daily_stats folds the deltas in later."""
+    day = datetime.utcnow().date()
+    if async_engine.dialect.name == "postgresql":
+        # Shared with other writers, exclusive against rebuild_daily_reports
+        # until this transaction ends (SQLite's write lock already serializes them)
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock_shared(:key, :day)"),
+            {"key": DAILY_STATS_LOCK_KEY, "day": day.toordinal()}
+        )
+    await db.execute(
+        insert(DailyStatsDelta).values(
+            day=day,
+            complaints_created=complaints,
+            escalations_created=escalations
+        )
+    )
+
+# ============================================================================
+# COMPLAINTS
+# ============================================================================
+
+async def create_complaint(db: AsyncSession, complaint_id: str, order_id: str, issue: str) -> str:
+    """Insert a complaint; raises NotFoundError for an unknown order and
+    AlreadyExistsError for a duplicate ID"""
+    # Duplicate IDs are resolved by ON CONFLICT and unknown orders by the FK,
+    # so the insert is the only round trip
+    stmt = (
+        dialect_insert(Complaint)
+        .values(
+            id=complaint_id,
+            order_id=order_id,
+            issue=issue,
+            escalation_status="Not Escalated"
+        )
+        .on_conflict_do_nothing(index_elements=[Complaint.id])
+        .returning(Complaint.id)
+    )
+
+    try:
+        result = await db.execute(stmt)
+    except IntegrityError:
+        raise NotFoundError("Order not found")
+
+    if result.scalar_one_or_none() is None:
+        raise AlreadyExistsError("Complaint already exists")
+
+    await bump_daily_stats(db, complaints=1)
+    return complaint_id
+
+async def ensure_complaint(db: AsyncSession, complaint_id: str, order_id: str, issue: str) -> dict:
+    """Create a complaint unless one already exists for this ID or order, and return it either way"""
+    # Under READ COMMITTED, NOT EXISTS alone lets two concurrent ensures for the
+    # same order both insert; locking the order row first serializes them (on
+    # SQLite the write transaction already does)
+    result = await db.execute(select(Order.order_id).filter(Order.order_id == order_id).with_for_update())
+    if result.scalar_one_or_none() is None:
+        raise NotFoundError("Order not found")
+
+    # INSERT ... SELECT ... WHERE NOT EXISTS skips orders that already have a
+    # complaint; ON CONFLICT covers a replayed complaint ID
+    candidate = select(
+        literal(complaint_id),
+        literal(order_id),
+        literal(issue),
+        literal("Not Escalated"),
+        literal(datetime.utcnow())
+    ).where(~exists().where(Complaint.order_id == order_id))
+
+    stmt = (
+        dialect_insert(Complaint)
+        .from_select(["id", "order_id", "issue", "escalation_status", "created_at"], candidate)
+        .on_conflict_do_nothing(index_elements=[Complaint.id])
+        .returning(Complaint.id)
+    )
+
+    result = await db.execute(stmt)
+    if result.scalar_one_or_none() is not None:
+        await bump_daily_stats(db, complaints=1)
+        return {
+            "created": True,
+            "complaint_id": complaint_id,
+            "order_id": order_id,
+            "issue": issue,
+            "escalation_status": "Not Escalated"
+        }
+
+    # Nothing inserted: return the complaint that blocked it, preferring an ID match
+    result = await db.execute(
+        select(Complaint)
+        .filter(or_(Complaint.id == complaint_id, Complaint.order_id == order_id))
+        .order_by(case((Complaint.id == complaint_id, 0), else_=1))
+        .limit(1)
+    )
+    existing = result.scalar_one()
+
+    return {
+        "created": False,
+        "complaint_id": existing.id,
+        "order_id": existing.order_id,
+        "issue": existing.issue,
+        "escalation_status": existing.escalation_status
+    }
+
+async def _first_complaint(db: AsyncSession, condition) -> Optional[dict]:
+    # An order can have several complaints; report the first by id
+    result = await db.execute(select(Complaint).filter(condition).order_by(Complaint.id).limit(1))
+    complaint = result.scalars().first()
+    return complaint_to_dict(complaint) if complaint else None
+
+async def get_complaint(db: AsyncSession, complaint_id: str) -> Optional[dict]:
+    return await _first_complaint(db, Complaint.id == complaint_id)
+
+async def get_complaint_for_order(db: AsyncSession, order_id: str) -> Optional[dict]:
+    return await _first_complaint(db, Complaint.order_id == order_id)
+
+# ============================================================================
+# ORDERS
+# ============================================================================
+
+async def get_order(db: AsyncSession, order_id: str) -> Optional[dict]:
+    result = await db.execute(select(Order).filter(Order.order_id == order_id))
+    order = result.scalar_one_or_none()
+    return order_to_dict(order) if order else None
+
+async def lookup_orders(db: AsyncSession, order_ids: List[str]) -> dict:
+    """Resolve many order IDs with a single IN query, preserving request order"""
+    unique_ids = list(dict.fromkeys(order_ids))
+    result = await db.execute(select(Order).filter(Order.order_id.in_(unique_ids)))
+    found = {order.order_id: order for order in result.scalars()}
+
+    return {
+        "orders": [order_to_dict(found[order_id]) for order_id in unique_ids if order_id in found],
+        "missing": [order_id for order_id in unique_ids if order_id not in found]
+    }
+
+# ============================================================================
+# ESCALATIONS
+# ============================================================================
+
+async def escalate_complaint(db: AsyncSession, complaint_id: str,
+                             escalation_id: Optional[str] = None) -> Tuple[str, str]:
+    """Mark the complaint escalated and open an escalation; returns (escalation_id, order_id).
+    Replaying a caller-supplied escalation_id opens nothing new."""
+    # The UPDATE both checks existence and takes the row lock (FOR UPDATE
+    # semantics on Postgres, the database write lock on SQLite), so concurrent
+    # escalations of the same complaint serialize on it until commit
+    result = await db.execute(
+        update(Complaint)
+        .where(Complaint.id == complaint_id)
+        .values(escalation_status="Escalated")
+        .returning(Complaint.order_id)
+    )
+
+    order_id = result.scalar_one_or_none()
+    if order_id is None:
+        raise NotFoundError("Complaint not found")
+
+    escalation_id = escalation_id or str(uuid4())
+
+    result = await db.execute(
+        dialect_insert(Escalation)
+        .values(
+            id=escalation_id,
+            complaint_id=complaint_id,
+            status="Pending"
+        )
+        .on_conflict_do_nothing(index_elements=[Escalation.id])
+        .returning(Escalation.id)
+    )
+    if result.scalar_one_or_none() is not None:
+        await bump_daily_stats(db, escalations=1)
+    return escalation_id, order_id
+
+async def sweep_stale_escalations(db: AsyncSession, older_than: timedelta, limit: int,
+                                  sweep: str = "stale_escalations") -> dict:
+    """
+    Next batch of escalations still Pending after older_than, past the sweep's
+    high-water mark, oldest first. Read-only: the caller advances the mark with
+    advance_sweep once the batch is handled, so a failure returns it again.
+    Uses ix_escalations_status_created_at_id, so each run only reads new rows.
+    """
+    state = (await db.execute(select(SweepState).filter(SweepState.name == sweep))).scalar_one_or_none()
+
+    stmt = select(Escalation).filter(
+        Escalation.status == "Pending",
+        Escalation.created_at < datetime.utcnow() - older_than
+    )
+    if state is not None and state.last_created_at is not None:
+        stmt = stmt.filter(
+            tuple_(Escalation.created_at, Escalation.id) > tuple_(state.last_created_at, state.last_id)
+        )
+    result = await db.execute(stmt.order_by(Escalation.created_at, Escalation.id).limit(limit + 1))
+    rows = list(result.scalars())
+    escalations = rows[:limit]
+
+    return {
+        "escalations": [
+            {
+                "id": escalation.id,
+                "complaint_id": escalation.complaint_id,
+                "status": escalation.status,
+                "created_at": escalation.created_at.isoformat()
+            }
+            for escalation in escalations
+        ],
+        "has_more": len(rows) > limit
+    }
+
+async def advance_sweep(db: AsyncSession, last_created_at: datetime, last_id: str,
+                        sweep: str = "stale_escalations") -> bool:
+    """Move the sweep's high-water mark to (last_created_at, last_id), never backwards;
+    True if it moved"""
+    await db.execute(
+        dialect_insert(SweepState).values(name=sweep).on_conflict_do_nothing(index_elements=[SweepState.name])
+    )
+    # Row lock on Postgres; on SQLite the write transaction already serializes sweeps
+    state = (await db.execute(
+        select(SweepState).filter(SweepState.name == sweep).with_for_update()
+    )).scalar_one()
+
+    state.updated_at = datetime.utcnow()
+    if state.last_created_at is not None and (last_created_at, last_id) <= (state.last_created_at, state.last_id):
+        return False
+    state.last_created_at = last_created_at
+    state.last_id = last_id
+    return True
+
+# ============================================================================
+# REPORTS
+# ============================================================================
+
+def daily_report(day: date, stats: Optional[DailyStats]) -> dict:
+    escalated = stats.escalations_created if stats else 0
+    resolved = stats.escalations_resolved if stats else 0
+    return {
+        "date": day.isoformat(),
+        "generated_at": datetime.utcnow().isoformat(),
+        "summary": {
+            # A complaint can be escalated more than once, so these count escalations
+            "total_complaints": stats.complaints_created if stats else 0,
+            "total_escalations": escalated,
+            "resolved_escalations": resolved,
+            "pending_escalations": escalated - resolved
+        },
+        "status": "generated"
+    }
+
+async def get_daily_report(db: AsyncSession, day: date) -> dict:
+    """Daily complaint/escalation summary: the day's counters plus deltas not rolled up yet"""
+    # One statement, so a roll-up committing meanwhile is seen entirely or not at all
+    counters = union_all(
+        select(DailyStats.complaints_created, DailyStats.escalations_created, DailyStats.escalations_resolved)
+        .filter(DailyStats.day == day),
+        select(DailyStatsDelta.complaints_created, DailyStatsDelta.escalations_created, literal(0))
+        .filter(DailyStatsDelta.day == day)
+    ).subquery()
+    complaints, escalations, resolved = (await db.execute(
+        select(*(func.coalesce(func.sum(column), 0) for column in counters.c))
+    )).one()
+
+    return daily_report(day, DailyStats(
+        day=day,
+        complaints_created=complaints,
+        escalations_created=escalations,
+        escalations_resolved=resolved
+    ))
+
+async def roll_up_daily_stats(db: AsyncSession, limit: int) -> dict:
+    """Fold up to limit of the oldest counter deltas into DailyStats"""
+    # DELETE ... RETURNING claims the rows in one statement, so a concurrent
+    # roll-up cannot fold the same rows again; SKIP LOCKED (Postgres) keeps it
+    # from waiting on rows another roll-up is already folding
+    claimed = (
+        select(DailyStatsDelta.id)
+        .order_by(DailyStatsDelta.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        delete(DailyStatsDelta)
+        .where(DailyStatsDelta.id.in_(claimed))
+        .returning(DailyStatsDelta.day, DailyStatsDelta.complaints_created, DailyStatsDelta.escalations_created)
+    )
+
+    totals = {}
+    rolled_up = 0
+    for day, complaints, escalations in result:
+        rolled_up += 1
+        day_totals = totals.setdefault(day, [0, 0])
+        day_totals[0] += complaints
+        day_totals[1] += escalations
+
+    if totals:
+        # Days in order, so concurrent roll-ups lock counter rows in the same order
+        stmt = dialect_insert(DailyStats).values([
+            {"day": day, "complaints_created": complaints, "escalations_created": escalations, "escalations_resolved": 0}
+            for day, (complaints, escalations) in sorted(totals.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyStats.day],
+            set_={
+                "complaints_created": DailyStats.complaints_created + stmt.excluded.complaints_created,
+                "escalations_created": DailyStats.escalations_created + stmt.excluded.escalations_created
+            }
+        )
+        await db.execute(stmt)
+
+    return {"rolled_up": rolled_up, "days": len(totals), "has_more": rolled_up == limit}
+
+async def rebuild_daily_reports(db: AsyncSession, start: date, end: date) -> List[dict]:
+    """Recompute the per-day counters for a date range from the source tables"""
+    if end < start:
+        raise RepositoryError("end must not be before start")
+    if (end - start).days >= 366:
+        raise RepositoryError("Date range is limited to one year")
+
+    range_start = datetime.combine(start, datetime.min.time())
+    range_end = datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+    if async_engine.dialect.name == "postgresql":
+        # Under READ COMMITTED a write committing between the delta DELETE and
+        # the aggregates below would be counted by both; waiting out in-flight
+        # writers to these days and holding them off until commit prevents that
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(:key, day) FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS day"),
+            {"key": DAILY_STATS_LOCK_KEY, "first": start.toordinal(), "last": end.toordinal()}
+        )
+
+    # The source tables already include what the pending deltas count
+    await db.execute(delete(DailyStatsDelta).where(DailyStatsDelta.day.between(start, end)))
+
+    counts = {}
+
+    def day_counts(raw_day) -> dict:
+        # SQLite's date() returns text, Postgres returns a date
+        day = raw_day if isinstance(raw_day, date) else date.fromisoformat(raw_day)
+        return counts.setdefault(day, {"complaints_created": 0, "escalations_created": 0, "escalations_resolved": 0})
+
+    # One grouped aggregate per source table over the indexed created_at range
+    complaint_day = func.date(Complaint.created_at)
+    result = await db.execute(
+        select(complaint_day, func.count())
+        .filter(Complaint.created_at >= range_start, Complaint.created_at < range_end)
+        .group_by(complaint_day)
+    )
+    for raw_day, total in result:
+        day_counts(raw_day)["complaints_created"] = total
+
+    escalation_day = func.date(Escalation.created_at)
+    result = await db.execute(
+        select(
+            escalation_day,
+            func.count(),
+            func.sum(case((Escalation.status == "Resolved", 1), else_=0))
+        )
+        .filter(Escalation.created_at >= range_start, Escalation.created_at < range_end)
+        .group_by(escalation_day)
+    )
+    for raw_day, total, resolved in result:
+        day_counts(raw_day).update(escalations_created=total, escalations_resolved=resolved or 0)
+
+    # Replace every day in the range, including days that now have no rows
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    rows = [{"day": day, **day_counts(day)} for day in days]
+    stmt = dialect_insert(DailyStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStats.day],
+        set_={
+            "complaints_created": stmt.excluded.complaints_created,
+            "escalations_created": stmt.excluded.escalations_created,
+            "escalations_resolved": stmt.excluded.escalations_resolved
+        }
+    )
+    await db.execute(stmt)
+
+    return [daily_report(row["day"], DailyStats(**row)) for row in rows]
+
+# ============================================================================
+# WORKFLOWS
+# ============================================================================
+
+CRITICAL_KEYWORDS = ["damaged", "lost", "wrong item", "missing", "urgent", "critical"]
+
+def is_critical(issue: str) -> bool:
+    return any(keyword in issue.lower() for keyword in CRITICAL_KEYWORDS)
+
+async def run_complaint_workflow(db: AsyncSession, order_id: str, issue: str, complaint_id: str) -> dict:
+    """Check order -> create complaint -> auto-escalate if critical, in the caller's
+    transaction, so a failure leaves nothing behind. Returns the per-step report."""
+    workflow_result = {
+        "order_id": order_id,
+        "complaint_id": complaint_id,
+        "steps": []
+    }
+
+    order = await get_order(db, order_id)
+    if order is None:
+        workflow_result["steps"].append({"step": "check_order", "status": "failed", "error": "Order not found"})
+        return workflow_result
+    workflow_result["steps"].append({"step": "check_order", "status": "success", "order": order})
+
+    try:
+        # The order was just read, so this can only be rejected as a duplicate,
+        # which ON CONFLICT reports without aborting the transaction
+        await create_complaint(db, complaint_id, order_id, issue)
+    except RepositoryError as exc:
+        workflow_result["steps"].append({"step": "create_complaint", "status": "failed", "error": exc.detail})
+        return workflow_result
+    workflow_result["steps"].append({
+        "step": "create_complaint",
+        "status": "success",
+        "complaint": {"message": "Complaint created successfully", "complaint_id": complaint_id}
+    })
+
+    if is_critical(issue):
+        escalation_id, _ = await escalate_complaint(db, complaint_id)
+        workflow_result["steps"].append({
+            "step": "auto_escalate",
+            "status": "success",
+            "escalation": {"message": "Complaint escalated successfully", "escalation_id": escalation_id}
+        })
+    else:
+        workflow_result["steps"].append({"step": "auto_escalate", "status": "skipped", "reason": "Not a critical issue"})
+
+    workflow_result["completed"] = True
+    return workflow_result
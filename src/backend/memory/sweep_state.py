@@ -0,0 +1,12 @@
+from .base import Base
+from sqlalchemy import Column, DateTime, String
+
+class SweepState(Base):
+    """High-water mark of a periodic sweep: the last (created_at, id) it processed,
+    so the next run only scans rows after it"""
+    __tablename__ = "sweep_state"
+
+    name = Column(String, primary_key=True)
+    last_created_at = Column(DateTime, nullable=True)
+    last_id = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
@@ -0,0 +1,91 @@
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Metrics are per process; with several uvicorn workers each one is scraped separately
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "API request latency by route template",
+    ["method", "route"]
+)
+REQUESTS = Counter(
+    "api_requests_total",
+    "API requests by route template and status code",
+    ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "api_requests_in_flight",
+    "API requests currently being handled"
+)
+SQL_LATENCY = Histogram(
+    "api_sql_statement_duration_seconds",
+    "SQL statement execution time by statement type",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+SQL_QUERIES_PER_REQUEST = Histogram(
+    "api_sql_queries_per_request",
+    "Number of SQL statements executed per API request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 20, 50, 100)
+)
+
+class _RequestQueries:
+    """Mutable per-request counter; shared with the tasks/greenlets the request spawns"""
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+_request_queries: ContextVar[Optional[_RequestQueries]] = ContextVar("request_queries", default=None)
+
+def instrument_engine(engine):
+    """Time every statement on the engine and count it against the current request"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        SQL_LATENCY.labels(operation=operation).observe(elapsed)
+
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.count += 1
+
+def register_gauge(name: str, documentation: str, read: Callable[[], float]):
+    """Expose a value computed at scrape time, e.g. pool occupancy or cache counters"""
+    Gauge(name, documentation).set_function(read)
+
+async def metrics_middleware(request: Request, call_next):
+    queries = _RequestQueries()
+    token = _request_queries.set(queries)
+    REQUESTS_IN_FLIGHT.inc()
+    started = perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        REQUEST_LATENCY.labels(method=request.method, route=route_path).observe(perf_counter() - started)
+        REQUESTS.labels(method=request.method, route=route_path, status=str(status)).inc()
+        SQL_QUERIES_PER_REQUEST.labels(route=route_path).observe(queries.count)
+        REQUESTS_IN_FLIGHT.dec()
+        _request_queries.reset(token)
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
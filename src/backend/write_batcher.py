@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+WriteOperation = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteCoalescer:
+    """
+    Group commit for write endpoints: operations submitted by concurrent requests
+    are collected for up to window_ms (or max_batch items) and committed together
+    in one transaction. Each operation runs inside its own SAVEPOINT, so one
+    failing operation is rolled back and reported to its caller alone.
+
+    Experimental and off by default (WRITE_BATCH_ENABLED): on one API worker it
+    measured slower than a transaction per request on both SQLite and Postgres,
+    since every operation still pays for its SAVEPOINT round trips.
+    """
+
+    def __init__(self, session_factory, max_batch: int = 100, window_ms: float = 5.0):
+        self._session_factory = session_factory
+        self._max_batch = max_batch
+        self._window = window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, operation: WriteOperation) -> Any:
+        """Queue operation(session) and wait until its batch has been committed"""
+        if self._worker is None:
+            raise RuntimeError("WriteCoalescer has not been started")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[WriteOperation, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._window
+
+        while len(batch) < self._max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._commit(batch)
+            except Exception as exc:
+                logger.exception("Write batch failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    async def _commit(self, batch: List[Tuple[WriteOperation, asyncio.Future]]):
+        outcomes = []
+        async with self._session_factory() as session:
+            for operation, future in batch:
+                if future.cancelled():
+                    continue
+                try:
+                    async with session.begin_nested():
+                        outcomes.append((future, await operation(session), None))
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+            await session.commit()
+
+        # Results are only released once the whole batch is durable
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        logger.debug(f"Committed write batch of {len(outcomes)} operations")
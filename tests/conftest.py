@@ -0,0 +1,47 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+# Settings and engines are created at import, so point them at a throwaway
+# SQLite database (and fill the required keys) before anything imports them
+_db_dir = tempfile.mkdtemp(prefix="customer-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+for name in ("GOOGLE_API_KEY", "GROQ_API_KEY", "COHERE_API_KEY", "SCRAPEGRAPH_API_KEY", "TAVILY_API_KEY",
+             "LANGSMITH_API_KEY", "LANGSMITH_PROJECT", "REDIS_PASSWORD", "REDIS_APPENDONLY",
+             "REDIS_MAXMEMORY", "REDIS_MAXMEMORY_POLICY", "REDIS_PROTECTED_MODE"):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("LANGSMITH_TRACING", "false")
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+
+# src/backend/celery would shadow the celery package once src/backend is on the path
+import celery.signals  # noqa: E402,F401
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "src" / "backend"))
+
+from memory.base import async_engine, async_write_engine  # noqa: E402
+from init_db import init_db  # noqa: E402
+
+
+def run(coro):
+    """Run a test coroutine on a fresh loop; pooled connections belong to that
+    loop, so they are dropped before it closes"""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+            await async_write_engine.dispose()
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    run(init_db())
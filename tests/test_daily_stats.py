@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import func, select
+
+import api
+from memory import repository
+from memory.daily_stats import DailyStatsDelta
+from conftest import run
+
+
+async def report_today() -> dict:
+    async with api.AsyncSessionLocal() as db:
+        return (await repository.get_daily_report(db, datetime.utcnow().date()))["summary"]
+
+
+async def pending_deltas() -> int:
+    async with api.AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(DailyStatsDelta))).scalar_one()
+
+
+async def roll_up(limit: int) -> dict:
+    async with api.AsyncWriteSessionLocal() as db:
+        result = await repository.roll_up_daily_stats(db, limit)
+        await db.commit()
+    return result
+
+
+async def write_complaints_and_escalations(count: int):
+    async def one():
+        complaint_id = f"STATS-{uuid4()}"
+        await api.run_write(lambda db: repository.create_complaint(db, complaint_id, "ORD141", "Parcel late"))
+        await api.run_write(lambda db: repository.escalate_complaint(db, complaint_id))
+    await asyncio.gather(*(one() for _ in range(count)))
+
+
+def test_roll_up_keeps_report_totals():
+    async def test():
+        before = await report_today()
+        await write_complaints_and_escalations(40)
+
+        expected = dict(before)
+        expected["total_complaints"] += 40
+        expected["total_escalations"] += 40
+        expected["pending_escalations"] += 40
+        assert await report_today() == expected
+        assert await pending_deltas() >= 80
+
+        # Concurrent roll-ups in small batches fold every delta exactly once
+        while any(result["has_more"] for result in await asyncio.gather(roll_up(7), roll_up(7), roll_up(7))):
+            pass
+        assert await pending_deltas() == 0
+        assert await report_today() == expected
+
+    run(test())
+
+
+def test_rebuild_replaces_pending_deltas():
+    async def test():
+        await write_complaints_and_escalations(10)
+        today = datetime.utcnow().date()
+
+        async with api.AsyncWriteSessionLocal() as db:
+            [rebuilt] = await repository.rebuild_daily_reports(db, today, today)
+            await db.commit()
+
+        assert await pending_deltas() == 0
+        assert await report_today() == rebuilt["summary"]
+
+    run(test())
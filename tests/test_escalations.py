@@ -0,0 +1,179 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from uuid import uuid4
+
+import httpx
+import pytest
+from sqlalchemy import select, update
+
+import api
+from memory.complaints import Complaint
+from memory import repository
+from memory.escalation import Escalation
+from write_batcher import WriteCoalescer
+from conftest import run
+
+PARALLEL_ESCALATIONS = 300
+
+
+@pytest.fixture(params=[False, True], ids=["own-transaction", "group-commit"])
+def coalesced(request, monkeypatch):
+    """Run each test with every write in its own transaction, then through the WriteCoalescer"""
+    if request.param:
+        monkeypatch.setattr(api, "write_coalescer", WriteCoalescer(api.AsyncWriteSessionLocal, max_batch=50, window_ms=5))
+    else:
+        monkeypatch.setattr(api, "write_coalescer", None)
+    return request.param
+
+
+async def with_client(test):
+    if api.write_coalescer is not None:
+        await api.write_coalescer.start()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://test") as client:
+            return await test(client)
+    finally:
+        if api.write_coalescer is not None:
+            await api.write_coalescer.stop()
+
+
+async def create_complaints(client, count: int) -> list:
+    complaint_ids = [f"ESC-{uuid4()}" for _ in range(count)]
+    response = await client.post("/complaints/bulk", json={"complaints": [
+        {"id": complaint_id, "order_id": "ORD123", "issue": "Parcel late"} for complaint_id in complaint_ids
+    ]})
+    assert response.json()["created"] == count
+    return complaint_ids
+
+
+async def escalations_today(client) -> int:
+    response = await client.get("/reports/daily", params={"day": datetime.utcnow().date().isoformat()})
+    return response.json()["summary"]["total_escalations"]
+
+
+async def escalation_rows(complaint_ids: list):
+    async with api.AsyncSessionLocal() as db:
+        escalations = (await db.execute(
+            select(Escalation).filter(Escalation.complaint_id.in_(complaint_ids))
+        )).scalars().all()
+        statuses = (await db.execute(
+            select(Complaint.escalation_status).filter(Complaint.id.in_(complaint_ids))
+        )).scalars().all()
+    return escalations, statuses
+
+
+def test_parallel_escalations_of_distinct_complaints(coalesced):
+    async def test(client):
+        complaint_ids = await create_complaints(client, PARALLEL_ESCALATIONS)
+        counted_before = await escalations_today(client)
+
+        responses = await asyncio.gather(*(
+            client.post("/escalations", json={"complaint_id": complaint_id}) for complaint_id in complaint_ids
+        ))
+
+        assert [response.status_code for response in responses] == [200] * PARALLEL_ESCALATIONS
+        escalation_ids = {response.json()["escalation_id"] for response in responses}
+        assert len(escalation_ids) == PARALLEL_ESCALATIONS
+
+        escalations, statuses = await escalation_rows(complaint_ids)
+        assert Counter(escalation.complaint_id for escalation in escalations) == Counter(complaint_ids)
+        assert {escalation.id for escalation in escalations} == escalation_ids
+        assert {escalation.status for escalation in escalations} == {"Pending"}
+        assert statuses == ["Escalated"] * PARALLEL_ESCALATIONS
+
+        assert await escalations_today(client) - counted_before == PARALLEL_ESCALATIONS
+
+    run(with_client(test))
+
+
+def test_parallel_escalations_of_one_complaint(coalesced):
+    async def test(client):
+        [complaint_id] = await create_complaints(client, 1)
+        counted_before = await escalations_today(client)
+
+        # Every request updates the same complaint row; none may be lost or fail
+        responses = await asyncio.gather(*(
+            client.post("/escalations", json={"complaint_id": complaint_id}) for _ in range(PARALLEL_ESCALATIONS)
+        ))
+
+        assert [response.status_code for response in responses] == [200] * PARALLEL_ESCALATIONS
+        escalations, statuses = await escalation_rows([complaint_id])
+        assert len(escalations) == PARALLEL_ESCALATIONS
+        assert {escalation.id for escalation in escalations} == {response.json()["escalation_id"] for response in responses}
+        assert statuses == ["Escalated"]
+
+        assert await escalations_today(client) - counted_before == PARALLEL_ESCALATIONS
+
+    run(with_client(test))
+
+
+def test_parallel_escalations_of_unknown_complaints_change_nothing(coalesced):
+    async def test(client):
+        counted_before = await escalations_today(client)
+
+        responses = await asyncio.gather(*(
+            client.post("/escalations", json={"complaint_id": f"MISSING-{uuid4()}"}) for _ in range(50)
+        ))
+
+        assert {response.status_code for response in responses} == {404}
+        assert await escalations_today(client) == counted_before
+
+    run(with_client(test))
+
+
+def test_replayed_escalation_id_opens_one_escalation():
+    async def test(client):
+        [complaint_id] = await create_complaints(client, 1)
+        counted_before = await escalations_today(client)
+
+        # A worker retrying after its commit was lost replays the same escalation ID
+        escalation_id = str(uuid4())
+        for _ in range(3):
+            async with api.AsyncWriteSessionLocal() as db:
+                assert await repository.escalate_complaint(db, complaint_id, escalation_id) == (escalation_id, "ORD123")
+                await db.commit()
+
+        escalations, _ = await escalation_rows([complaint_id])
+        assert [escalation.id for escalation in escalations] == [escalation_id]
+        assert await escalations_today(client) - counted_before == 1
+
+    run(with_client(test))
+
+
+def test_sweep_returns_a_batch_until_the_mark_advances():
+    async def test(client):
+        complaint_ids = await create_complaints(client, 3)
+        escalation_ids = []
+        for complaint_id in complaint_ids:
+            response = await client.post("/escalations", json={"complaint_id": complaint_id})
+            escalation_ids.append(response.json()["escalation_id"])
+        # Older than anything else in the test database, in a known order
+        async with api.AsyncWriteSessionLocal() as db:
+            for second, escalation_id in enumerate(escalation_ids):
+                await db.execute(
+                    update(Escalation).where(Escalation.id == escalation_id).values(created_at=datetime(2000, 1, 1, 0, 0, second))
+                )
+            await db.commit()
+
+        async def sweep() -> list:
+            response = await client.post("/escalations/sweep", json={"older_than_minutes": 1, "limit": 2})
+            return [escalation["id"] for escalation in response.json()["escalations"]]
+
+        async def advance(escalation: dict) -> bool:
+            response = await client.post("/escalations/sweep/advance", json={
+                "last_created_at": escalation["created_at"], "last_id": escalation["id"]
+            })
+            return response.json()["advanced"]
+
+        # Until its alert is handed off, a batch is returned again
+        assert await sweep() == escalation_ids[:2]
+        assert await sweep() == escalation_ids[:2]
+
+        first = {"id": escalation_ids[0], "created_at": datetime(2000, 1, 1, 0, 0, 0).isoformat()}
+        second = {"id": escalation_ids[1], "created_at": datetime(2000, 1, 1, 0, 0, 1).isoformat()}
+        assert await advance(second)
+        assert not await advance(first)
+        assert (await sweep())[0] == escalation_ids[2]
+
+    run(with_client(test))
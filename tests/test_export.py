@@ -0,0 +1,64 @@
+import os
+import tracemalloc
+from uuid import uuid4
+
+from sqlalchemy import create_engine, func, insert, select
+
+import api
+from memory.complaints import Complaint
+from conftest import run
+
+SMALL_EXPORT = 20_000
+LARGE_EXPORT = 100_000
+
+
+def seed_complaints(total: int):
+    """Top the complaints table up to `total` rows"""
+    engine = create_engine(os.environ["DATABASE_URL"])
+    with engine.begin() as conn:
+        missing = total - conn.execute(select(func.count()).select_from(Complaint)).scalar_one()
+        if missing > 0:
+            conn.execute(insert(Complaint), [
+                {"id": f"EXPORT-{uuid4()}", "order_id": "ORD123", "issue": "Parcel late " * 10,
+                 "escalation_status": "Not Escalated"}
+                for _ in range(missing)
+            ])
+    engine.dispose()
+
+
+def export_peak(export_format: str) -> tuple:
+    """Stream a whole export, dropping each chunk, and return (rows, peak traced bytes)"""
+    async def consume():
+        rows = 0
+        async for chunk in api.stream_complaint_export(export_format):
+            rows += chunk.count("\n")
+        return rows
+
+    tracemalloc.start()
+    try:
+        rows = run(consume())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return rows, peak
+
+
+def test_export_memory_does_not_grow_with_rows():
+    seed_complaints(SMALL_EXPORT)
+    small_rows, small_peak = export_peak("ndjson")
+    seed_complaints(LARGE_EXPORT)
+    large_rows, large_peak = export_peak("ndjson")
+
+    assert small_rows >= SMALL_EXPORT
+    assert large_rows >= LARGE_EXPORT
+    # Five times the rows: a materialized export would need about five times the memory
+    assert large_peak < small_peak * 1.5
+    assert large_peak < 32 * 1024 * 1024
+
+
+def test_csv_export_streams_every_row():
+    seed_complaints(SMALL_EXPORT)
+    rows, peak = export_peak("csv")
+    assert rows - 1 >= SMALL_EXPORT
+    assert peak < 32 * 1024 * 1024
+
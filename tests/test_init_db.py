@@ -0,0 +1,48 @@
+import sqlite3
+
+from sqlalchemy import create_engine, inspect
+
+from memory.base import Base
+from init_db import DROPPED_INDEXES, upgrade_schema
+
+# Schema as created before complaints and escalations had created_at
+EARLIER_SCHEMA = """
+CREATE TABLE orders (order_id VARCHAR NOT NULL PRIMARY KEY, status VARCHAR NOT NULL, estimated_delivery VARCHAR NOT NULL);
+CREATE TABLE complaints (id VARCHAR NOT NULL PRIMARY KEY, order_id VARCHAR REFERENCES orders (order_id), issue TEXT, escalation_status VARCHAR);
+CREATE INDEX ix_complaints_order_id ON complaints (order_id);
+CREATE TABLE escalations (id VARCHAR NOT NULL PRIMARY KEY, complaint_id VARCHAR NOT NULL REFERENCES complaints (id), status VARCHAR);
+CREATE INDEX ix_escalations_status_id ON escalations (status, id);
+INSERT INTO orders VALUES ('ORD1', 'Shipped', '2025-01-01');
+INSERT INTO complaints VALUES ('C1', 'ORD1', 'Parcel late', 'Escalated');
+INSERT INTO escalations VALUES ('E1', 'C1', 'Pending');
+"""
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        upgrade_schema(conn)
+
+
+def test_upgrade_adds_columns_and_indexes(tmp_path):
+    path = tmp_path / "earlier.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(EARLIER_SCHEMA)
+    engine = create_engine(f"sqlite:///{path}")
+
+    # A second run finds nothing left to do
+    upgrade(engine)
+    upgrade(engine)
+
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        assert set(table.columns.keys()) <= columns
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= indexes
+        assert not indexes & set(DROPPED_INDEXES)
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT created_at FROM complaints").scalar_one() is not None
+        assert conn.exec_driver_sql("SELECT created_at FROM escalations").scalar_one() is not None
+    engine.dispose()
@@ -0,0 +1,49 @@
+import asyncio
+
+from src.backend.celery.notifications import NotificationBuffer, StubTransport
+
+
+class FlakyTransport(StubTransport):
+    """Rejects the first `failures` calls, then records like the stub"""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.calls = 0
+
+    async def send(self, channel: str, digests: list):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("gateway unavailable")
+        await super().send(channel, digests)
+
+
+def send_through(transport, max_attempts: int) -> NotificationBuffer:
+    async def main():
+        buffer = NotificationBuffer(transport, window=60, batch_size=10, max_attempts=max_attempts, retry_backoff=0.01)
+        for i in range(30):
+            buffer.add(f"customer{i % 3}@example.com", "email", "order_update", {"n": i})
+        await buffer.flush()
+        return buffer
+    return asyncio.run(main())
+
+
+def test_failed_batch_is_retried_until_sent():
+    transport = FlakyTransport(failures=2)
+    buffer = send_through(transport, max_attempts=3)
+
+    assert transport.calls == 3
+    assert buffer.retries == 2
+    assert buffer.failed_digests == 0
+    assert buffer.sent_digests == 3
+    assert sorted(len(digest["events"]) for digest in transport.sent) == [10, 10, 10]
+
+
+def test_batch_is_dropped_after_last_attempt():
+    transport = FlakyTransport(failures=10)
+    buffer = send_through(transport, max_attempts=3)
+
+    assert transport.calls == 3
+    assert buffer.failed_digests == 3
+    assert buffer.sent_digests == 0
+    assert not transport.sent
@@ -0,0 +1,38 @@
+import httpx
+
+import api
+from conftest import run
+
+
+async def with_client(test):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://test") as client:
+        return await test(client)
+
+
+def test_lookup_returns_found_and_missing_in_request_order():
+    async def test(client):
+        response = await client.post("/orders/lookup", json={"order_ids": ["ORD456", "NOPE", "ORD123", "ORD456"]})
+        assert response.status_code == 200
+        assert [order["order_id"] for order in response.json()["orders"]] == ["ORD456", "ORD123"]
+        assert response.json()["missing"] == ["NOPE"]
+
+    run(with_client(test))
+
+
+def test_lookups_over_the_cap_are_rejected(monkeypatch):
+    monkeypatch.setattr(api.settings, "LOOKUP_MAX_IDS", 3)
+    order_ids = ["ORD123", "ORD456", "ORD141", "ORD999"]
+
+    async def test(client):
+        response = await client.get("/orders", params={"ids": ",".join(order_ids)})
+        assert response.status_code == 422
+
+        # Blank entries are dropped before the cap applies
+        response = await client.get("/orders", params={"ids": ",".join(order_ids[:3]) + ",,"})
+        assert response.status_code == 200
+
+        # The body model takes its cap at import, from the default
+        response = await client.post("/orders/lookup", json={"order_ids": order_ids * 300})
+        assert response.status_code == 422
+
+    run(with_client(test))
@@ -0,0 +1,48 @@
+from uuid import uuid4
+
+import httpx
+import pytest
+
+import api
+from conftest import run
+
+
+async def with_client(test):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://test") as client:
+        return await test(client)
+
+
+@pytest.mark.parametrize("path", ["/complaints", "/escalations"])
+@pytest.mark.parametrize("cursor", ["!!!", "", "abc", "W10=", "WyJ4IiwgIngiXQ=="])
+def test_malformed_cursor_is_rejected(path, cursor):
+    async def test(client):
+        response = await client.get(path, params={"cursor": cursor})
+        assert response.status_code == 400
+
+    run(with_client(test))
+
+
+def test_escalation_pages_follow_creation_order():
+    async def test(client):
+        complaint_ids = [f"PAGE-{uuid4()}" for _ in range(7)]
+        await client.post("/complaints/bulk", json={"complaints": [
+            {"id": complaint_id, "order_id": "ORD456", "issue": "Parcel late"} for complaint_id in complaint_ids
+        ]})
+        for complaint_id in complaint_ids:
+            await client.post("/escalations", json={"complaint_id": complaint_id})
+
+        items, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            page = (await client.get("/escalations", params=params)).json()
+            items += page["items"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len({item["id"] for item in items}) == len(items)
+        assert [item["created_at"] for item in items] == sorted(item["created_at"] for item in items)
+        ours = [item["complaint_id"] for item in items if item["complaint_id"] in complaint_ids]
+        assert ours == complaint_ids
+
+    run(with_client(test))
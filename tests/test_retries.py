@@ -0,0 +1,28 @@
+import httpx
+import pytest
+
+from src.backend.celery.runtime import RetryableHTTPError, raise_for_status
+from src.backend.celery.tasks import RETRYABLE_ERRORS
+
+
+def response(status_code: int) -> httpx.Response:
+    return httpx.Response(status_code, request=httpx.Request("GET", "http://api/orders/ORD123"))
+
+
+@pytest.mark.parametrize("status_code", [500, 502, 503, 429])
+def test_server_errors_and_rate_limits_are_retried(status_code):
+    with pytest.raises(RetryableHTTPError) as raised:
+        raise_for_status(response(status_code))
+    assert isinstance(raised.value, RETRYABLE_ERRORS)
+    assert raised.value.response.status_code == status_code
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 404, 409, 422])
+def test_other_client_errors_fail_fast(status_code):
+    with pytest.raises(httpx.HTTPStatusError) as raised:
+        raise_for_status(response(status_code))
+    assert not isinstance(raised.value, RETRYABLE_ERRORS)
+
+
+def test_success_passes_through():
+    raise_for_status(response(200))